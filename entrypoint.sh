@@ -27,6 +27,17 @@ else
     echo "Skipping static files collection (SKIP_COLLECTSTATIC=true)"
 fi
 
+# Remove the metrics of previous runs, the workers write theirs to this directory
+METRICS_DIR="${METRICS_DIR:-/tmp/recipe_viewer_metrics}"
+rm -rf "$METRICS_DIR"
+mkdir -p "$METRICS_DIR"
+export METRICS_DIR
+
+# Remove the cached pages of the previous release, which may have been rendered from other templates
+if [ "${PAGE_CACHE_BACKEND:-filesystem}" = "filesystem" ]; then
+    rm -rf "${PAGE_CACHE_DIR:-/tmp/recipe_viewer_pages}"
+fi
+
 echo "Starting Uvicorn server..."
 exec uvicorn recipe_viewer.asgi:application \
     --host 0.0.0.0 \
@@ -1,6 +1,18 @@
+from functools import partial
+
 from django.apps import AppConfig
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipe_viewer.apps.accounts"
+
+    def ready(self) -> None:
+        from recipe_viewer.apps.accounts import signals  # noqa: F401
+        from recipe_viewer.apps.accounts.permissions import group_permissions
+        from recipe_viewer.apps.accounts.permissions import user_permissions
+        from recipe_viewer.apps.monitoring.metrics import register_collector
+
+        # The signal handlers imported above invalidate cached permissions when they change
+        register_collector(partial(user_permissions.collect_metrics, "user_permissions"))
+        register_collector(partial(group_permissions.collect_metrics, "group_permissions"))
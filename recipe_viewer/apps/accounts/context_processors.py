@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.contrib.auth.context_processors import PermWrapper
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
+
+from recipe_viewer.apps.accounts.permissions import prime_permissions
+
+
+def auth(request: HttpRequest) -> dict[str, Any]:
+    """``django.contrib.auth.context_processors.auth`` answering ``perms`` from the permission cache."""
+    user = request.user if hasattr(request, "user") else AnonymousUser()
+
+    def permissions() -> PermWrapper:
+        prime_permissions(user)
+        return PermWrapper(user)
+
+    return {"user": user, "perms": SimpleLazyObject(permissions)}
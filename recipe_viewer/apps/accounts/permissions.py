@@ -0,0 +1,126 @@
+"""
+Per-worker cache of the permissions of users and groups.
+
+Django resolves the permissions of a user with two queries on every request that checks one, and the views and
+templates each do so on their own user object. The permission names are cached per user and per group instead
+and primed onto the user object of the request as an immutable set, where ``ModelBackend`` finds them. Entries
+are invalidated by the signal handlers in ``recipe_viewer.apps.accounts.signals`` when this worker changes
+permissions or group memberships. Other workers are not told, so they keep granting revoked permissions until
+their entries expire after ``PERMISSION_CACHE_TTL`` seconds, which is kept short for that reason.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import Permission
+
+from recipe_viewer.apps.accounts.models import User
+from recipe_viewer.caching import LRUCache
+
+# Returned by `apermission_key` for every anonymous user, who has no permissions
+ANONYMOUS_PERMISSION_KEY = "anonymous"
+
+
+@dataclass(frozen=True, slots=True)
+class UserPermissionsEntry:
+    group_ids: frozenset[int]
+    # Permissions granted to the user directly, as "app_label.codename"
+    permissions: frozenset[str]
+
+
+user_permissions: LRUCache[int, UserPermissionsEntry] = LRUCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL,
+)
+group_permissions: LRUCache[int, frozenset[str]] = LRUCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL,
+)
+
+
+def _needs_priming(user: Any) -> bool:
+    # Superusers pass every check and inactive or anonymous users fail them without looking at permissions
+    return user.is_authenticated and user.is_active and not user.is_superuser and not hasattr(user, "_perm_cache")
+
+
+def _cached_permissions(user_id: int) -> frozenset[str] | None:
+    entry = user_permissions.get(user_id)
+    if entry is None:
+        return None
+    groups = [group_permissions.get(group_id) for group_id in entry.group_ids]
+    if any(permissions is None for permissions in groups):
+        return None
+    return entry.permissions.union(*groups)
+
+
+def _load_permissions(user_id: int) -> frozenset[str]:
+    user_generation, group_generation = user_permissions.generation, group_permissions.generation
+    own = frozenset(
+        f"{app_label}.{codename}"
+        for app_label, codename in Permission.objects.filter(user=user_id).values_list(
+            "content_type__app_label", "codename"
+        )
+    )
+    # One row per permission of each group of the user, groups without permissions yield a single row of None
+    by_group: dict[int, set[str]] = {}
+    for group_id, app_label, codename in User.groups.through.objects.filter(user=user_id).values_list(
+        "group", "group__permissions__content_type__app_label", "group__permissions__codename"
+    ):
+        permissions = by_group.setdefault(group_id, set())
+        if codename is not None:
+            permissions.add(f"{app_label}.{codename}")
+
+    user_permissions.set(user_id, UserPermissionsEntry(frozenset(by_group), own), user_generation)
+    for group_id, permissions in by_group.items():
+        group_permissions.set(group_id, frozenset(permissions), group_generation)
+    return own.union(*by_group.values())
+
+
+def prime_permissions(user: Any) -> None:
+    """Attach the cached permissions of `user`, so permission checks against it run no queries."""
+    if not _needs_priming(user):
+        return
+    permissions = _cached_permissions(user.pk)
+    user._perm_cache = permissions if permissions is not None else _load_permissions(user.pk)  # noqa: SLF001
+
+
+async def aprime_permissions(user: Any) -> None:
+    """Async version of `prime_permissions`, only switching to a thread when the cache misses."""
+    if not _needs_priming(user):
+        return
+    permissions = _cached_permissions(user.pk)
+    if permissions is None:
+        permissions = await sync_to_async(_load_permissions)(user.pk)
+    user._perm_cache = permissions  # noqa: SLF001
+
+
+async def apermission_key(user: Any) -> str:
+    """Identify `user` and their permissions, for validators of content rendered differently per user."""
+    if not user.is_authenticated:
+        return ANONYMOUS_PERMISSION_KEY
+    if not user.is_active:
+        return f"{user.pk}:inactive"
+    if user.is_superuser:
+        return f"{user.pk}:superuser"
+    await aprime_permissions(user)
+    return f"{user.pk}:{','.join(sorted(user._perm_cache))}"  # noqa: SLF001
+
+
+def invalidate_users(user_ids: set[int] | None) -> None:
+    """Drop the cached permissions of the given users, or of every user if `user_ids` is None."""
+    if user_ids is None:
+        user_permissions.clear()
+        return
+    for user_id in user_ids:
+        user_permissions.delete(user_id)
+
+
+def invalidate_groups(group_ids: set[int] | None) -> None:
+    """Drop the cached permissions of the given groups, or of every group if `group_ids` is None."""
+    if group_ids is None:
+        group_permissions.clear()
+        return
+    for group_id in group_ids:
+        group_permissions.delete(group_id)
@@ -0,0 +1,67 @@
+from functools import partial
+from typing import Any
+
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from recipe_viewer.apps.accounts.models import User
+from recipe_viewer.apps.accounts.permissions import invalidate_groups
+from recipe_viewer.apps.accounts.permissions import invalidate_users
+
+
+def _changed_ids(instance: Model, reverse: bool, pk_set: set[int] | None) -> set[int] | None:  # noqa: FBT001
+    """Return the ids of the forward side of a changed relation, None if they are unknown."""
+    if not reverse:
+        return {instance.pk}
+    # Clearing a relation from the reverse side does not report the affected objects
+    return pk_set
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(
+    sender: type[Model],  # noqa: ARG001
+    instance: Model,
+    action: str,
+    reverse: bool,  # noqa: FBT001
+    pk_set: set[int] | None,
+    **kwargs: Any,  # noqa: ARG001
+) -> None:
+    if action.startswith("post_"):
+        transaction.on_commit(partial(invalidate_users, _changed_ids(instance, reverse, pk_set)))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(
+    sender: type[Model],  # noqa: ARG001
+    instance: Model,
+    action: str,
+    reverse: bool,  # noqa: FBT001
+    pk_set: set[int] | None,
+    **kwargs: Any,  # noqa: ARG001
+) -> None:
+    if action.startswith("post_"):
+        transaction.on_commit(partial(invalidate_groups, _changed_ids(instance, reverse, pk_set)))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender: type[User], instance: User, **kwargs: Any) -> None:  # noqa: ARG001
+    transaction.on_commit(partial(invalidate_users, {instance.pk}))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender: type[Group], instance: Group, **kwargs: Any) -> None:  # noqa: ARG001
+    # Users of the group miss its entry and reload their own
+    transaction.on_commit(partial(invalidate_groups, {instance.pk}))
+
+
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender: type[Permission], instance: Permission, **kwargs: Any) -> None:  # noqa: ARG001
+    # The relations to the permission are deleted without m2m_changed signals
+    transaction.on_commit(partial(invalidate_users, None))
+    transaction.on_commit(partial(invalidate_groups, None))
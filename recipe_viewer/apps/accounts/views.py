@@ -1,41 +1,80 @@
 from __future__ import annotations
 
-from typing import cast
-
 from asgiref.sync import sync_to_async
-from django.contrib.auth.views import LoginView
-from django.contrib.auth.views import LogoutView
+from django.conf import settings
+from django.contrib.auth import alogin
+from django.contrib.auth import alogout
+from django.contrib.auth.views import RedirectURLMixin
 from django.http import HttpRequest
 from django.http import HttpResponse
-from django.urls import reverse_lazy
+from django.http import HttpResponseRedirect
+from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext as _
+from django.views import View
+from django.views.decorators.cache import never_cache
+from django.views.decorators.debug import sensitive_post_parameters
 from django.views.decorators.http import require_http_methods
 from django.views.i18n import set_language as django_set_language
 
 from recipe_viewer.apps.accounts.forms import EmailAuthenticationForm
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+from recipe_viewer.executors import ExecutorSaturated
 
+# Seconds a client rejected during a burst of logins is asked to wait before retrying
+LOGIN_RETRY_AFTER = 5
 
-class AsyncCompatViewMixin:
-    """Wrap Django's sync class-based views so they can be awaited."""
 
-    @classmethod
-    def as_view(cls, **initkwargs):
-        view = super().as_view(**initkwargs)
+class AsyncLoginView(RedirectURLMixin, View):
+    """Log users in without blocking the threads that render pages.
 
-        async def async_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
-            handler = sync_to_async(view)
-            return await handler(request, *args, **kwargs)
+    Verifying the password hashes it for hundreds of milliseconds, so the form is validated on the "auth" pool of
+    ``EXECUTORS``. Once its queue is full further attempts are answered with 429 instead of queueing up.
+    """
 
-        return async_view
+    template_name = "accounts/login.html"
+    next_page = settings.LOGIN_REDIRECT_URL
 
+    async def _render_form(self, request: HttpRequest, form: EmailAuthenticationForm) -> HttpResponse:
+        context = {
+            "form": form,
+            "next": self.get_redirect_url(),
+            "redirect_field_name": self.redirect_field_name,
+        }
+        return await timed_sync_to_async(render, "render", executor="render")(request, self.template_name, context)
+
+    @method_decorator(never_cache)
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        user = await request.auser()
+        if user.is_authenticated:
+            return HttpResponseRedirect(self.get_success_url())
+        return await self._render_form(request, EmailAuthenticationForm(request))
+
+    @method_decorator([sensitive_post_parameters(), never_cache])
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        form = EmailAuthenticationForm(request, data=request.POST)
+        try:
+            is_valid = await timed_sync_to_async(form.is_valid, "auth", executor="auth")()
+        except ExecutorSaturated:
+            return HttpResponse(
+                _("Too many sign-in attempts at the moment, please try again in a few seconds."),
+                status=429,
+                content_type="text/plain; charset=utf-8",
+                headers={"Retry-After": str(LOGIN_RETRY_AFTER)},
+            )
+        if not is_valid:
+            return await self._render_form(request, form)
+        await alogin(request, form.get_user())
+        return HttpResponseRedirect(self.get_success_url())
 
-class AsyncLoginView(AsyncCompatViewMixin, LoginView):
-    template_name = "accounts/login.html"
-    authentication_form = EmailAuthenticationForm
-    redirect_authenticated_user = True
 
+class AsyncLogoutView(RedirectURLMixin, View):
+    next_page = settings.LOGOUT_REDIRECT_URL
 
-class AsyncLogoutView(AsyncCompatViewMixin, LogoutView):
-    next_page: str | None = cast(str, reverse_lazy("recipe_list"))
+    @method_decorator(never_cache)
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        await alogout(request)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 @require_http_methods(["POST"])
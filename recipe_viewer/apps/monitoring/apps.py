@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "recipe_viewer.apps.monitoring"
+
+    def ready(self) -> None:
+        from recipe_viewer.apps.monitoring.queries import install_query_recorder
+
+        # Every connection records its statements into the recorder active for the current request
+        connection_created.connect(install_query_recorder)
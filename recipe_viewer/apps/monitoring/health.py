@@ -0,0 +1,79 @@
+"""
+Probes deciding whether a worker should receive traffic.
+
+Each probe measures one way a worker degrades before it fails outright: a slow database, an event loop busy with
+blocking work, or synchronous calls queueing for a thread of the pools in ``EXECUTORS``. The readiness endpoint
+compares the measurements with the ``HEALTH_*_THRESHOLD`` settings.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+from recipe_viewer.executors import get_executor
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeResult:
+    name: str
+    # Seconds the probe took, None if it failed or timed out
+    seconds: float | None
+    threshold: float
+    error: str = ""
+
+    @property
+    def healthy(self) -> bool:
+        return self.seconds is not None and self.seconds <= self.threshold
+
+    def as_dict(self) -> dict[str, object]:
+        result: dict[str, object] = {
+            "healthy": self.healthy,
+            "ms": None if self.seconds is None else round(self.seconds * 1000, 2),
+            "threshold_ms": round(self.threshold * 1000, 2),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+def _ping_database() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+async def probe_database(threshold: float, timeout: float) -> ProbeResult:
+    """Time a trivial round trip to the database, including waiting for a thread to run it on."""
+    started_at = time.perf_counter()
+    try:
+        await asyncio.wait_for(sync_to_async(_ping_database)(), timeout)
+    except TimeoutError:
+        return ProbeResult("database", None, threshold, f"no answer within {timeout}s")
+    except Exception as error:  # noqa: BLE001
+        return ProbeResult("database", None, threshold, type(error).__name__)
+    return ProbeResult("database", time.perf_counter() - started_at, threshold)
+
+
+async def probe_event_loop_lag(threshold: float) -> ProbeResult:
+    """Measure how long a callback waits behind the work already scheduled on the event loop."""
+    loop = asyncio.get_running_loop()
+    ran = loop.create_future()
+    scheduled_at = time.perf_counter()
+    loop.call_soon(lambda: ran.set_result(time.perf_counter()))
+    return ProbeResult("event_loop_lag", await ran - scheduled_at, threshold)
+
+
+async def probe_thread_pool(name: str, threshold: float, timeout: float) -> ProbeResult:
+    """Measure how long a no-op waits for a thread of the pool `name`, including the calls queued before it."""
+    executor = get_executor(name)
+    started_at = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            sync_to_async(time.perf_counter, thread_sensitive=executor is None, executor=executor)(), timeout
+        )
+    except TimeoutError:
+        return ProbeResult(f"thread_pool_{name}", None, threshold, f"no thread within {timeout}s")
+    return ProbeResult(f"thread_pool_{name}", time.perf_counter() - started_at, threshold)
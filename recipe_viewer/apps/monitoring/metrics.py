@@ -0,0 +1,276 @@
+"""
+Prometheus metrics aggregated across the uvicorn worker processes.
+
+Every process keeps its metrics in memory and a background thread writes a snapshot to ``METRICS_DIR`` every
+``METRICS_FLUSH_INTERVAL`` seconds. The process serving ``/metrics`` merges the snapshots of all processes:
+counters and histograms are summed over every process that ever wrote one, so restarted workers do not lose
+their counts, while gauges only include processes that are still alive. ``METRICS_DIR`` has to be emptied
+before the workers start, see ``entrypoint.sh``.
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections.abc import Callable
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+# Upper bounds of the latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+type Labels = tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[Labels, Any] = {}
+        REGISTRY[name] = self
+
+    def _key(self, labels: dict[str, str]) -> Labels:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[list[Any]]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        """Mirror a total that is counted elsewhere, like the hits of a cache."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Non-cumulative bucket counts followed by the +Inf bucket, the sum and the count
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0.0] * (len(self.buckets) + 3)
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+
+REGISTRY: dict[str, _Metric] = {}
+_collectors: list[Callable[[], None]] = []
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """Call `collector` before every snapshot, so it can update metrics mirrored from elsewhere."""
+    _collectors.append(collector)
+
+
+def snapshot() -> dict[str, Any]:
+    for collector in _collectors:
+        collector()
+    return {
+        name: {
+            "kind": metric.kind,
+            "documentation": metric.documentation,
+            "labelnames": list(metric.labelnames),
+            "buckets": list(getattr(metric, "buckets", ())),
+            "samples": metric.samples(),
+        }
+        for name, metric in REGISTRY.items()
+    }
+
+
+def _snapshot_path(pid: int) -> Path:
+    return Path(settings.METRICS_DIR) / f"{pid}.json"
+
+
+def flush() -> None:
+    """Write the snapshot of this process, replacing the previous one atomically."""
+    path = _snapshot_path(os.getpid())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(snapshot()), encoding="utf-8")
+    temporary.replace(path)
+
+
+class _Flusher:
+    def __init__(self) -> None:
+        self._started_pid: int | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start flushing in the background, once per process."""
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+        thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+        thread.start()
+        atexit.register(flush)
+
+    @staticmethod
+    def _run() -> None:
+        stopped = threading.Event()
+        while not stopped.wait(settings.METRICS_FLUSH_INTERVAL):
+            flush()
+
+
+start_flushing = _Flusher().start
+
+
+# Metrics of the request handling, see ``MetricsMiddleware``
+REQUEST_DURATION = Histogram(
+    "recipe_viewer_http_request_duration_seconds",
+    "Time until the response headers are sent.",
+    ["view", "method"],
+)
+REQUESTS = Counter("recipe_viewer_http_requests_total", "Handled requests.", ["view", "method", "status"])
+REQUESTS_IN_FLIGHT = Gauge("recipe_viewer_http_requests_in_flight", "Requests waiting for their response headers.")
+STREAMS_OPEN = Gauge("recipe_viewer_http_streams_open", "Streaming responses, like Datastar events, still sending.")
+DB_QUERIES = Counter("recipe_viewer_db_queries_total", "Database queries run by requests.", ["view"])
+DB_QUERY_SECONDS = Counter("recipe_viewer_db_query_seconds_total", "Time requests spent in the database.", ["view"])
+PHASE_SECONDS = Counter(
+    "recipe_viewer_request_phase_seconds_total",
+    "Time requests spent per phase, like rendering or waiting for a thread.",
+    ["view", "phase"],
+)
+
+# Metrics of the thread pools, see ``recipe_viewer.executors``
+EXECUTOR_QUEUED = Gauge("recipe_viewer_executor_queued", "Calls waiting for a thread of the pool.", ["executor"])
+EXECUTOR_RUNNING = Gauge("recipe_viewer_executor_running", "Calls running on a thread of the pool.", ["executor"])
+EXECUTOR_REJECTED = Counter(
+    "recipe_viewer_executor_rejected_total", "Calls rejected because the queue of the pool was full.", ["executor"]
+)
+EXECUTOR_WAIT = Histogram(
+    "recipe_viewer_executor_wait_seconds", "Time calls waited for a thread of the pool.", ["executor"]
+)
+
+# Metrics of the events broadcast to open streams, see ``recipe_viewer.broadcast``
+BROADCAST_SUBSCRIPTIONS = Gauge("recipe_viewer_broadcast_subscriptions", "Open subscriptions to broadcast topics.")
+BROADCAST_DELIVERED = Counter("recipe_viewer_broadcast_delivered_total", "Messages queued for a subscription.")
+BROADCAST_DROPPED = Counter(
+    "recipe_viewer_broadcast_dropped_total", "Messages dropped from the full queue of a slow subscription."
+)
+
+# Metrics of the loads shared by concurrent requests, see ``recipe_viewer.singleflight``
+SINGLEFLIGHT_LOADS = Counter("recipe_viewer_singleflight_loads_total", "Loads started by a caller.", ["flight"])
+SINGLEFLIGHT_COALESCED = Counter(
+    "recipe_viewer_singleflight_coalesced_total", "Callers that waited for a load already in flight.", ["flight"]
+)
+SINGLEFLIGHT_IN_FLIGHT = Gauge("recipe_viewer_singleflight_in_flight", "Loads still running.", ["flight"])
+
+# Metrics mirrored from the per-worker caches, see ``recipe_viewer.apps.recipes.cache``
+CACHE_HITS = Counter("recipe_viewer_cache_hits_total", "Cache lookups that found a valid entry.", ["cache"])
+CACHE_MISSES = Counter("recipe_viewer_cache_misses_total", "Cache lookups that found no valid entry.", ["cache"])
+CACHE_ENTRIES = Gauge("recipe_viewer_cache_entries", "Entries in the cache.", ["cache"])
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(merged: dict[str, Any], name: str, metric: dict[str, Any], *, alive: bool) -> None:
+    if metric["kind"] == "gauge" and not alive:
+        return
+    target = merged.setdefault(name, {**metric, "samples": {}})
+    for labels, value in metric["samples"]:
+        key = tuple(labels)
+        if isinstance(value, list):
+            previous = target["samples"].get(key, [0.0] * len(value))
+            target["samples"][key] = [a + b for a, b in zip(previous, value, strict=True)]
+        else:
+            target["samples"][key] = target["samples"].get(key, 0.0) + value
+
+
+def collect() -> dict[str, Any]:
+    """Merge the snapshots of every worker process, including a fresh one of this process."""
+    flush()
+    merged: dict[str, Any] = {}
+    for path in Path(settings.METRICS_DIR).glob("*.json"):
+        try:
+            metrics = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # Removed or replaced while reading, the next scrape picks it up again
+            continue
+        alive = _is_alive(int(path.stem))
+        for name, metric in metrics.items():
+            _merge(merged, name, metric, alive=alive)
+    return merged
+
+
+def _format_labels(labelnames: list[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(merged: dict[str, Any]) -> str:
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for name, metric in sorted(merged.items()):
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric["labelnames"]
+        for key, value in sorted(metric["samples"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, key)} {value}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip([*metric["buckets"], "+Inf"], value[:-2], strict=True):
+                cumulative += count
+                bucket_labels = _format_labels(labelnames, key, f'le="{bound}"')
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {value[-2]}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {value[-1]}")
+    return "\n".join(lines) + "\n"
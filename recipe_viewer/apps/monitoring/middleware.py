@@ -0,0 +1,267 @@
+import json
+import logging
+import random
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterator
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest
+from django.http import HttpResponseBase
+from django.http import StreamingHttpResponse
+
+from recipe_viewer.apps.monitoring import metrics
+from recipe_viewer.apps.monitoring.queries import QueryBudgetExceeded
+from recipe_viewer.apps.monitoring.queries import QueryRecorder
+from recipe_viewer.apps.monitoring.queries import activate
+from recipe_viewer.apps.monitoring.queries import active_recorder
+from recipe_viewer.apps.monitoring.timing import RequestTimings
+from recipe_viewer.apps.monitoring.timing import activate as activate_timings
+from recipe_viewer.apps.monitoring.timing import active_timings
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("recipe_viewer.timing")
+
+
+def check_query_budget(request: HttpRequest, recorder: QueryRecorder) -> None:
+    """Report a request exceeding the query budget of its URL name or repeating statements.
+
+    Violations are logged, or raised as ``QueryBudgetExceeded`` when ``QUERY_BUDGETS_STRICT`` is set.
+    """
+    url_name = request.resolver_match.url_name if request.resolver_match else None
+    if url_name is None:
+        return
+    problems: list[str] = []
+    budget = settings.QUERY_BUDGETS.get(url_name)
+    if budget is not None and len(recorder) > budget:
+        problems.append(f"ran {len(recorder)} queries, the budget is {budget}")
+    problems.extend(
+        f"ran the same statement {count} times, likely an N+1 pattern: {sql}"
+        for sql, count in recorder.repeated(settings.QUERY_BUDGET_REPEAT_THRESHOLD)
+    )
+    if not problems:
+        return
+    message = f"{request.method} {request.path} ({url_name}) " + "; ".join(problems)
+    if settings.QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning("%s", message)
+
+
+class QueryBudgetMiddleware:
+    """Record the queries of each request and check them against the budget of its URL name.
+
+    Streaming responses, like the Datastar endpoints, keep recording until their content is consumed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.QUERY_BUDGETS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder(parent=active_recorder())
+        previous = activate(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            activate(previous)
+        return self._finish(request, response, recorder)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        recorder = QueryRecorder(parent=active_recorder())
+        previous = activate(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            activate(previous)
+        return self._finish(request, response, recorder)
+
+    def _finish(self, request: HttpRequest, response: HttpResponseBase, recorder: QueryRecorder) -> HttpResponseBase:
+        if not isinstance(response, StreamingHttpResponse):
+            check_query_budget(request, recorder)
+        elif response.is_async:
+            response.streaming_content = self._arecord_stream(request, response.streaming_content, recorder)
+        else:
+            response.streaming_content = self._record_stream(request, response.streaming_content, recorder)
+        return response
+
+    @staticmethod
+    def _record_stream(request: HttpRequest, content: Iterator[bytes], recorder: QueryRecorder) -> Iterator[bytes]:
+        previous = activate(recorder)
+        try:
+            yield from content
+        finally:
+            activate(previous)
+        check_query_budget(request, recorder)
+
+    @staticmethod
+    async def _arecord_stream(
+        request: HttpRequest, content: AsyncIterator[bytes], recorder: QueryRecorder
+    ) -> AsyncIterator[bytes]:
+        previous = activate(recorder)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            activate(previous)
+        check_query_budget(request, recorder)
+
+
+class ServerTimingMiddleware:
+    """Report where the time of each request went in a ``Server-Timing`` header.
+
+    The header lists the database time and query count, the phases recorded by the views (see
+    ``recipe_viewer.apps.monitoring.timing``) and the total. Streaming responses only cover the time until
+    their headers are sent. A share of ``SERVER_TIMING_LOG_SAMPLE_RATE`` requests is also logged as JSON.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(parent=active_timings())
+        recorder = QueryRecorder(parent=active_recorder())
+        previous_timings, previous_recorder = activate_timings(timings), activate(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            activate_timings(previous_timings)
+            activate(previous_recorder)
+        self._report(request, response, timings, recorder)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        timings = RequestTimings(parent=active_timings())
+        recorder = QueryRecorder(parent=active_recorder())
+        previous_timings, previous_recorder = activate_timings(timings), activate(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            activate_timings(previous_timings)
+            activate(previous_recorder)
+        self._report(request, response, timings, recorder)
+        return response
+
+    @staticmethod
+    def _report(
+        request: HttpRequest, response: HttpResponseBase, timings: RequestTimings, recorder: QueryRecorder
+    ) -> None:
+        total = time.perf_counter() - timings.started_at
+        metrics = [f'db;dur={recorder.duration * 1000:.1f};desc="{len(recorder)} queries"']
+        metrics += [f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in timings.phases.items()]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(metrics)
+
+        if random.random() >= settings.SERVER_TIMING_LOG_SAMPLE_RATE:  # noqa: S311
+            return
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "view": request.resolver_match.view_name if request.resolver_match else None,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(recorder.duration * 1000, 2),
+            "queries": len(recorder),
+            **{f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in timings.phases.items()},
+        }
+        timing_logger.info("%s", json.dumps(entry))
+
+
+class MetricsMiddleware:
+    """Count requests, their latency, queries and phases per view for the ``/metrics`` endpoint.
+
+    Like the ``Server-Timing`` header, the latency of streaming responses covers the time until their headers are
+    sent, while their queries and phases are counted once their content is consumed. Open streams are counted
+    separately.
+    """
+
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        markcoroutinefunction(self)
+        metrics.start_flushing()
+
+    async def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        timings = RequestTimings(parent=active_timings())
+        recorder = QueryRecorder(parent=active_recorder())
+        previous_timings, previous_recorder = activate_timings(timings), activate(recorder)
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            activate_timings(previous_timings)
+            activate(previous_recorder)
+            metrics.REQUESTS_IN_FLIGHT.dec()
+
+        # Unresolved paths share one label, so scanners cannot blow up the number of series
+        view = request.resolver_match.view_name if request.resolver_match else "unresolved"
+        method = request.method or ""
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - timings.started_at, view=view, method=method)
+        metrics.REQUESTS.inc(view=view, method=method, status=str(response.status_code))
+        if not isinstance(response, StreamingHttpResponse):
+            self._count_work(view, timings, recorder)
+        elif response.is_async:
+            response.streaming_content = self._acount_stream(response.streaming_content, view, timings, recorder)
+        else:
+            response.streaming_content = self._count_stream(response.streaming_content, view, timings, recorder)
+        return response
+
+    @staticmethod
+    def _count_work(view: str, timings: RequestTimings, recorder: QueryRecorder) -> None:
+        metrics.DB_QUERIES.inc(len(recorder), view=view)
+        metrics.DB_QUERY_SECONDS.inc(recorder.duration, view=view)
+        for phase, seconds in timings.phases.items():
+            metrics.PHASE_SECONDS.inc(seconds, view=view, phase=phase)
+
+    @classmethod
+    def _count_stream(
+        cls, content: Iterator[bytes], view: str, timings: RequestTimings, recorder: QueryRecorder
+    ) -> Iterator[bytes]:
+        metrics.STREAMS_OPEN.inc()
+        previous_timings, previous_recorder = activate_timings(timings), activate(recorder)
+        try:
+            yield from content
+        finally:
+            activate_timings(previous_timings)
+            activate(previous_recorder)
+            metrics.STREAMS_OPEN.dec()
+            cls._count_work(view, timings, recorder)
+
+    @classmethod
+    async def _acount_stream(
+        cls, content: AsyncIterator[bytes], view: str, timings: RequestTimings, recorder: QueryRecorder
+    ) -> AsyncIterator[bytes]:
+        metrics.STREAMS_OPEN.inc()
+        previous_timings, previous_recorder = activate_timings(timings), activate(recorder)
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            activate_timings(previous_timings)
+            activate(previous_recorder)
+            metrics.STREAMS_OPEN.dec()
+            cls._count_work(view, timings, recorder)
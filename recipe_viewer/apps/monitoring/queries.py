@@ -0,0 +1,101 @@
+"""
+Recording of the SQL statements run while handling a request.
+
+Async views run their queries in ``sync_to_async`` threads, each with its own connection. Every connection
+therefore gets an execute wrapper when it is created, which appends to the recorder of the current context.
+The context, and with it the active recorder, is carried into those threads by ``sync_to_async``.
+"""
+
+import re
+import time
+from collections import Counter
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_active_recorder: ContextVar["QueryRecorder | None"] = ContextVar("active_query_recorder", default=None)
+
+
+class QueryBudgetExceeded(Exception):  # noqa: N818
+    """A view ran more queries than its budget or repeated a statement like an N+1 pattern."""
+
+
+@dataclass(frozen=True, slots=True)
+class RecordedQuery:
+    sql: str
+    duration: float
+
+
+@dataclass
+class QueryRecorder:
+    # Recorders nest, the queries recorded for a request also count towards an enclosing benchmark
+    parent: "QueryRecorder | None" = None
+    queries: list[RecordedQuery] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        """Total time spent in the database in seconds."""
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Return the normalized statements run at least `threshold` times, most repeated first."""
+        counts = Counter(normalize_sql(query.sql) for query in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+
+def normalize_sql(sql: str) -> str:
+    """Reduce a statement to its shape, so the same query with other parameters groups together."""
+    return _LITERAL.sub("?", _IN_LIST.sub("IN (...)", sql))
+
+
+def _record(execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+    recorder = _active_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query = RecordedQuery(sql, time.perf_counter() - started_at)
+        while recorder is not None:
+            recorder.queries.append(query)
+            recorder = recorder.parent
+
+
+def install_query_recorder(connection: BaseDatabaseWrapper, **kwargs: object) -> None:  # noqa: ARG001
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def active_recorder() -> QueryRecorder | None:
+    return _active_recorder.get()
+
+
+def activate(recorder: QueryRecorder | None) -> QueryRecorder | None:
+    """Make `recorder` record the queries of the current context and return the previously active one."""
+    previous = _active_recorder.get()
+    _active_recorder.set(recorder)
+    return previous
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Record every query run in the current context, including ``sync_to_async`` calls made from it."""
+    recorder = QueryRecorder(parent=_active_recorder.get())
+    token = _active_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorder.reset(token)
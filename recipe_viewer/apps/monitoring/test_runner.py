@@ -0,0 +1,39 @@
+from argparse import ArgumentParser
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Test runner that fails every request exceeding its query budget when run with --query-budgets."""
+
+    def __init__(self, *args: object, query_budgets: bool = False, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.query_budgets = query_budgets
+
+    @classmethod
+    def add_arguments(cls, parser: ArgumentParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--query-budgets",
+            action="store_true",
+            help="Raise QueryBudgetExceeded from requests exceeding QUERY_BUDGETS or repeating statements",
+        )
+
+    def setup_test_environment(self, **kwargs: object) -> None:
+        super().setup_test_environment(**kwargs)
+        # Pool threads have connections of their own, which cannot see the data of the transaction around a test
+        settings.EXECUTORS = dict.fromkeys(settings.EXECUTORS, 0)
+        # Shared page caches outlive the test database, a cache per process stands in for them
+        self._page_cache = override_settings(
+            CACHES={**settings.CACHES, "pages": {**settings.CACHES["pages"], **settings.PAGE_CACHE_BACKENDS["locmem"]}}
+        )
+        self._page_cache.enable()
+        if self.query_budgets:
+            settings.QUERY_BUDGETS_ENABLED = True
+            settings.QUERY_BUDGETS_STRICT = True
+
+    def teardown_test_environment(self, **kwargs: object) -> None:
+        self._page_cache.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,105 @@
+"""
+Per-request timing of the phases a request spends its time in.
+
+Views mark their phases with ``timed`` or call synchronous code through ``timed_sync_to_async``, which also
+records how long the call waited for the thread running synchronous code ("hop"), including the queue of its thread
+pool. The time spent on database queries comes from the query recorder. ``ServerTimingMiddleware`` reports the
+result in a ``Server-Timing`` header.
+"""
+
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from recipe_viewer.executors import get_executor
+
+# Timestamps `timed_sync_to_async` records on the thread, when the call started and when it finished
+THREAD_TIMES_RECORDED = 2
+
+_active_timings: ContextVar["RequestTimings | None"] = ContextVar("active_request_timings", default=None)
+
+
+@dataclass
+class RequestTimings:
+    # Timings nest like query recorders, the phases seen by the metrics also count towards the header
+    parent: "RequestTimings | None" = None
+    started_at: float = field(default_factory=time.perf_counter)
+    # Accumulated seconds per phase, in the order the phases were first entered
+    phases: dict[str, float] = field(default_factory=dict)
+
+    def add(self, phase: str, seconds: float) -> None:
+        timings: RequestTimings | None = self
+        while timings is not None:
+            timings.phases[phase] = timings.phases.get(phase, 0.0) + seconds
+            timings = timings.parent
+
+
+def active_timings() -> RequestTimings | None:
+    return _active_timings.get()
+
+
+def activate(timings: RequestTimings | None) -> RequestTimings | None:
+    """Make `timings` collect the phases of the current context and return the previously active ones."""
+    previous = _active_timings.get()
+    _active_timings.set(timings)
+    return previous
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to `phase` of the current request."""
+    timings = _active_timings.get()
+    if timings is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started_at)
+
+
+def timed_sync_to_async[**P, R](
+    func: Callable[P, R], phase: str, executor: str | None = None
+) -> Callable[P, Awaitable[R]]:
+    """``sync_to_async`` recording the call as `phase` and the thread switches around it as "hop".
+
+    The call runs on the pool named `executor` in ``EXECUTORS`` if given and configured, and on the thread of the
+    request otherwise.
+    """
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        pool = get_executor(executor) if executor else None
+        timings = _active_timings.get()
+        if timings is None:
+            return await sync_to_async(func, thread_sensitive=pool is None, executor=pool)(*args, **kwargs)
+
+        thread_times: list[float] = []
+
+        def run() -> R:
+            thread_times.append(time.perf_counter())
+            try:
+                return func(*args, **kwargs)
+            finally:
+                thread_times.append(time.perf_counter())
+
+        submitted_at = time.perf_counter()
+        try:
+            return await sync_to_async(run, thread_sensitive=pool is None, executor=pool)()
+        finally:
+            resumed_at = time.perf_counter()
+            if len(thread_times) == THREAD_TIMES_RECORDED:
+                started_at, finished_at = thread_times
+                timings.add("hop", (started_at - submitted_at) + (resumed_at - finished_at))
+                timings.add(phase, finished_at - started_at)
+
+    return wrapper
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from recipe_viewer.apps.monitoring.views import liveness
+from recipe_viewer.apps.monitoring.views import metrics_view
+from recipe_viewer.apps.monitoring.views import readiness
+
+urlpatterns = [
+    path("metrics", metrics_view, name="metrics"),
+    path("health/live/", liveness, name="health_live"),
+    path("health/ready/", readiness, name="health_ready"),
+]
@@ -0,0 +1,47 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import JsonResponse
+
+from recipe_viewer.apps.monitoring.health import probe_database
+from recipe_viewer.apps.monitoring.health import probe_event_loop_lag
+from recipe_viewer.apps.monitoring.health import probe_thread_pool
+from recipe_viewer.apps.monitoring.metrics import collect
+from recipe_viewer.apps.monitoring.metrics import render
+
+
+async def metrics_view(request: HttpRequest) -> HttpResponse:  # noqa: ARG001
+    """Expose the metrics of all worker processes to Prometheus.
+
+    Not reachable through nginx, Prometheus scrapes the application server directly.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    merged = await sync_to_async(collect, thread_sensitive=False)()
+    return HttpResponse(render(merged), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def liveness(request: HttpRequest) -> HttpResponse:  # noqa: ARG001
+    """Answer as long as the event loop of the worker runs, without touching the database."""
+    return HttpResponse("OK", content_type="text/plain")
+
+
+async def readiness(request: HttpRequest) -> JsonResponse:  # noqa: ARG001
+    """Report whether the worker should receive traffic, answering 503 once a probe exceeds its threshold."""
+    # The event loop is probed first, before the other probes schedule work on it
+    probes = [await probe_event_loop_lag(settings.HEALTH_EVENT_LOOP_LAG_THRESHOLD)]
+    # Pools with a queue limit shed load themselves, a burst of logins should not take the worker out of rotation
+    probes += [
+        await probe_thread_pool(name, settings.HEALTH_THREAD_POOL_THRESHOLD, settings.HEALTH_PROBE_TIMEOUT)
+        for name in settings.EXECUTORS
+        if name not in settings.EXECUTOR_QUEUE_LIMITS
+    ]
+    probes.append(await probe_database(settings.HEALTH_DATABASE_THRESHOLD, settings.HEALTH_PROBE_TIMEOUT))
+    ready = all(probe.healthy for probe in probes)
+    return JsonResponse(
+        {"ready": ready, "probes": {probe.name: probe.as_dict() for probe in probes}},
+        status=200 if ready else 503,
+        headers={"Cache-Control": "no-store"},
+    )
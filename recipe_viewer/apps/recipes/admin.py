@@ -35,5 +35,7 @@ class IngredientAdmin(admin.ModelAdmin):
     """Admin interface for Ingredient model (standalone)"""
 
     list_display = ["name", "quantity", "unit", "recipe"]
+    # Fetch the recipe of every row with the list query instead of one query per row
+    list_select_related = ["recipe"]
     search_fields = ["name", "recipe__name"]
     list_filter = ["recipe"]
@@ -1,6 +1,18 @@
+from functools import partial
+
 from django.apps import AppConfig
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipe_viewer.apps.recipes"
+
+    def ready(self) -> None:
+        from recipe_viewer.apps.monitoring.metrics import register_collector
+        from recipe_viewer.apps.recipes import signals  # noqa: F401
+        from recipe_viewer.apps.recipes.cache import ingredient_fragments
+        from recipe_viewer.apps.recipes.cache import ingredient_snapshots
+
+        # The signal handlers imported above keep the search index and caches in sync
+        register_collector(partial(ingredient_snapshots.collect_metrics, "ingredient_snapshots"))
+        register_collector(partial(ingredient_fragments.collect_metrics, "ingredient_fragments"))
@@ -0,0 +1,204 @@
+"""
+In-process HTTP benchmark of the hot endpoints.
+
+Requests are sent straight to the ASGI application of ``recipe_viewer.asgi`` without a server or sockets, so the
+numbers cover the middleware, views, templates and database but not the network. Database queries are counted
+per request with the query recorder of the monitoring app.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from http.cookies import SimpleCookie
+from typing import Any
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from recipe_viewer.apps.monitoring.queries import record_queries
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkRequest:
+    method: str
+    path: str
+    query: dict[str, str] = field(default_factory=dict)
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """A named endpoint with a factory building the request for each iteration."""
+
+    name: str
+    build_request: Callable[[int], BenchmarkRequest]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries_per_request: float
+
+
+def _host() -> str:
+    host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+    return host or "localhost"
+
+
+class AsgiDriver:
+    """Send requests to an ASGI application in-process and measure them."""
+
+    def __init__(self, application: Callable) -> None:
+        self.application = application
+
+    def _scope(self, request: BenchmarkRequest) -> dict[str, Any]:
+        headers = [(b"host", _host().encode())]
+        headers += [(name.lower().encode(), value.encode()) for name, value in request.headers.items()]
+        if request.body:
+            headers.append((b"content-length", str(len(request.body)).encode()))
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": "http",
+            "path": request.path,
+            "raw_path": request.path.encode(),
+            "query_string": urlencode(request.query).encode(),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": (_host(), 80),
+        }
+
+    async def send(self, request: BenchmarkRequest) -> tuple[int, bytes, dict[str, str]]:
+        """Send one request and return its status, the complete body and the cookies it set."""
+        request_sent = False
+        disconnected = asyncio.Event()
+        status = 0
+        body: list[bytes] = []
+        cookies: dict[str, str] = {}
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": request.body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"set-cookie":
+                        parsed = SimpleCookie(value.decode())
+                        cookies.update({key: morsel.value for key, morsel in parsed.items()})
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    disconnected.set()
+
+        await self.application(self._scope(request), receive, send)
+        return status, b"".join(body), cookies
+
+    async def run(self, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> ScenarioResult:
+        """Send `requests` requests of a scenario from `concurrency` concurrent clients."""
+        for iteration in range(warmup):
+            await self.send(scenario.build_request(iteration))
+
+        latencies: list[float] = []
+        queries: list[int] = []
+        errors = 0
+        iterations = iter(range(requests))
+
+        async def client() -> None:
+            nonlocal errors
+            for iteration in iterations:
+                request = scenario.build_request(iteration)
+                with record_queries() as recorder:
+                    started_at = time.perf_counter()
+                    status, _body, _cookies = await self.send(request)
+                latencies.append(time.perf_counter() - started_at)
+                queries.append(len(recorder))
+                if status >= 400:
+                    errors += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        duration = time.perf_counter() - started_at
+        return _summarize(scenario.name, concurrency, latencies, queries, errors, duration)
+
+
+def _summarize(
+    name: str, concurrency: int, latencies: list[float], queries: list[int], errors: int, duration: float
+) -> ScenarioResult:
+    milliseconds = [latency * 1000 for latency in latencies]
+    if len(milliseconds) > 1:
+        percentiles = statistics.quantiles(milliseconds, n=100, method="inclusive")
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = milliseconds[0] if milliseconds else 0.0
+    return ScenarioResult(
+        name=name,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        duration_s=round(duration, 3),
+        throughput_rps=round(len(latencies) / duration, 1) if duration else 0.0,
+        mean_ms=round(statistics.fmean(milliseconds), 2) if milliseconds else 0.0,
+        p50_ms=round(p50, 2),
+        p95_ms=round(p95, 2),
+        p99_ms=round(p99, 2),
+        queries_per_request=round(statistics.fmean(queries), 2) if queries else 0.0,
+    )
+
+
+def results_to_json(results: list[ScenarioResult], metadata: dict[str, Any]) -> str:
+    return json.dumps({"metadata": metadata, "results": [asdict(result) for result in results]}, indent=2)
+
+
+def compare_to_baseline(results: list[ScenarioResult], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Describe every scenario that got slower, lost throughput or runs more queries than in the baseline.
+
+    `tolerance` is the relative slack, e.g. 0.1 accepts a p95 latency up to 10% above the baseline.
+    Query counts are deterministic and must not grow at all. Results are only compared at the same concurrency.
+    """
+    # Baselines written before results recorded their concurrency ran every scenario at the same one
+    default_concurrency = baseline.get("metadata", {}).get("concurrency")
+    baseline_results = {
+        (result["name"], result.get("concurrency", default_concurrency)): result
+        for result in baseline.get("results", [])
+    }
+    regressions: list[str] = []
+    for result in results:
+        previous = baseline_results.get((result.name, result.concurrency))
+        if previous is None:
+            continue
+        if result.p95_ms > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result.name}: p95 {previous['p95_ms']}ms -> {result.p95_ms}ms")
+        if result.throughput_rps < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{result.name}: throughput {previous['throughput_rps']}/s -> {result.throughput_rps}/s")
+        if result.queries_per_request > previous["queries_per_request"]:
+            regressions.append(
+                f"{result.name}: queries per request {previous['queries_per_request']} -> {result.queries_per_request}"
+            )
+        if result.errors > previous["errors"]:
+            regressions.append(f"{result.name}: errors {previous['errors']} -> {result.errors}")
+    return regressions
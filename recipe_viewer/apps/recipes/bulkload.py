@@ -0,0 +1,186 @@
+"""
+Bulk loading of new recipes below the ORM.
+
+PostgreSQL streams rows with psycopg's ``COPY ... FROM STDIN``, SQLite falls back to batched ``executemany``.
+Batches can be loaded from a pool of worker processes, each with its own database connection. Loaded rows
+bypass model signals, so callers rebuild the search index once the load is complete, while each batch invalidates
+the cached list pages itself.
+"""
+
+import multiprocessing
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
+from datetime import datetime
+
+import django
+from django.db import connection
+from django.db import connections
+from django.db import transaction
+from django.utils import timezone
+
+from recipe_viewer.apps.recipes.importing import RecipeRow
+from recipe_viewer.apps.recipes.signals import recipes_changed_in_bulk
+
+RECIPE_COLUMNS = (
+    "id",
+    "name",
+    "steps",
+    "created_at",
+    "updated_at",
+    "image",
+    "image_derivatives",
+    "external_id",
+    "content_hash",
+)
+INGREDIENT_COLUMNS = ("recipe_id", "name", "quantity", "unit")
+BULK_LOAD_TABLES = ("recipes_recipe", "recipes_ingredient")
+
+
+def _reserve_recipe_ids(count: int) -> list[int]:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence('recipes_recipe', 'id')) FROM generate_series(1, %s)",
+                [count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+        # SQLite has a single writer, so the ids following the current maximum are free
+        cursor.execute("SELECT coalesce(max(id), 0) FROM recipes_recipe")
+        first_id = cursor.fetchone()[0] + 1
+        return list(range(first_id, first_id + count))
+
+
+def _recipe_values(recipe_id: int, row: RecipeRow, now: datetime | str) -> tuple:
+    return (recipe_id, row.name, row.steps, now, now, row.image, "{}", row.external_id, row.content_hash)
+
+
+def load_batch(rows: Sequence[RecipeRow]) -> tuple[int, int]:
+    """Insert a batch of new recipes with their ingredients in one transaction.
+
+    Returns the number of recipes and ingredients written.
+    """
+    now = timezone.now()
+    ingredient_count = 0
+    with transaction.atomic():
+        recipe_ids = _reserve_recipe_ids(len(rows))
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                with cursor.copy(f"COPY recipes_recipe ({', '.join(RECIPE_COLUMNS)}) FROM STDIN") as copy:
+                    for recipe_id, row in zip(recipe_ids, rows, strict=True):
+                        copy.write_row(_recipe_values(recipe_id, row, now))
+                with cursor.copy(f"COPY recipes_ingredient ({', '.join(INGREDIENT_COLUMNS)}) FROM STDIN") as copy:
+                    for recipe_id, row in zip(recipe_ids, rows, strict=True):
+                        for ingredient in row.ingredients:
+                            copy.write_row((recipe_id, ingredient.name, ingredient.quantity, ingredient.unit))
+                            ingredient_count += 1
+            else:
+                now_value = connection.ops.adapt_datetimefield_value(now)
+                cursor.executemany(
+                    f"INSERT INTO recipes_recipe ({', '.join(RECIPE_COLUMNS)}) "  # noqa: S608
+                    f"VALUES ({', '.join(['%s'] * len(RECIPE_COLUMNS))})",
+                    [
+                        _recipe_values(recipe_id, row, now_value)
+                        for recipe_id, row in zip(recipe_ids, rows, strict=True)
+                    ],
+                )
+                ingredient_values = [
+                    (recipe_id, ingredient.name, ingredient.quantity, ingredient.unit)
+                    for recipe_id, row in zip(recipe_ids, rows, strict=True)
+                    for ingredient in row.ingredients
+                ]
+                cursor.executemany(
+                    f"INSERT INTO recipes_ingredient ({', '.join(INGREDIENT_COLUMNS)}) "  # noqa: S608
+                    f"VALUES ({', '.join(['%s'] * len(INGREDIENT_COLUMNS))})",
+                    ingredient_values,
+                )
+                ingredient_count = len(ingredient_values)
+        # New recipes only change the list pages
+        recipes_changed_in_bulk([])
+    return len(rows), ingredient_count
+
+
+@contextmanager
+def secondary_indexes_dropped() -> Iterator[None]:
+    """Drop the secondary indexes of the recipe tables for the duration of a bulk load (PostgreSQL only).
+
+    Indexes backing primary keys and constraints are kept. The dropped indexes are recreated from their
+    original definitions afterwards, which is much faster than maintaining them row by row.
+    """
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index AS i
+            WHERE i.indrelid = ANY(%s::regclass[])
+                AND NOT i.indisprimary
+                AND NOT EXISTS (SELECT 1 FROM pg_constraint AS c WHERE c.conindid = i.indexrelid)
+            """,
+            [list(BULK_LOAD_TABLES)],
+        )
+        index_definitions: list[tuple[str, str]] = cursor.fetchall()
+        for index_name, _definition in index_definitions:
+            cursor.execute(f"DROP INDEX {index_name}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _index_name, definition in index_definitions:
+                cursor.execute(definition)
+            for table in BULK_LOAD_TABLES:
+                cursor.execute(f"ANALYZE {table}")
+
+
+def _init_worker() -> None:
+    django.setup()
+
+
+def load_batches(
+    batches: Iterable[Sequence[RecipeRow]],
+    workers: int = 1,
+    on_batch_loaded: Callable[[int, int], None] | None = None,
+) -> tuple[int, int]:
+    """Load every batch, spread over `workers` processes, and return the number of recipes and ingredients.
+
+    SQLite only allows a single writer, so batches are always loaded in this process there.
+    """
+    recipe_count = 0
+    ingredient_count = 0
+
+    def loaded(result: tuple[int, int]) -> None:
+        nonlocal recipe_count, ingredient_count
+        recipe_count += result[0]
+        ingredient_count += result[1]
+        if on_batch_loaded is not None:
+            on_batch_loaded(*result)
+
+    if workers <= 1 or connection.vendor != "postgresql":
+        for batch in batches:
+            loaded(load_batch(batch))
+        return recipe_count, ingredient_count
+
+    # Worker processes open their own connections, none may be inherited from this process
+    connections.close_all()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+        pending: set[Future[tuple[int, int]]] = set()
+        for batch in batches:
+            # Bound the number of queued batches so memory stays flat however large the input is
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    loaded(future.result())
+            pending.add(executor.submit(load_batch, list(batch)))
+        for future in wait(pending).done:
+            loaded(future.result())
+    return recipe_count, ingredient_count
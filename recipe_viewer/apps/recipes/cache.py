@@ -0,0 +1,141 @@
+"""
+Per-worker in-process caches for recipe data, and the loads of it shared by concurrent requests.
+
+Every uvicorn worker holds its own copy. Entries are invalidated by the signal handlers in
+``recipe_viewer.apps.recipes.signals`` when the worker itself changes a recipe. Callers that loaded the recipe
+anyway, like its page, reject snapshots of an older revision. Requests that only scale the ingredients run no query
+on a hit, so they may be served changes made by other workers only once the entry's TTL expires.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.translation import get_language
+
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.caching import LRUCache
+from recipe_viewer.singleflight import SingleFlight
+
+
+@dataclass(frozen=True, slots=True)
+class IngredientSnapshot:
+    """Immutable copy of the fields of an ingredient needed to render it."""
+
+    name: str
+    quantity: float
+    unit: str
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeIngredientsSnapshot:
+    """Immutable copy of the ingredients of a recipe at the time it was last updated."""
+
+    recipe_id: int
+    updated_at: datetime
+    ingredients: tuple[IngredientSnapshot, ...]
+
+
+ingredient_snapshots: LRUCache[int, RecipeIngredientsSnapshot] = LRUCache(
+    maxsize=settings.RECIPE_INGREDIENT_CACHE_SIZE,
+    ttl=settings.RECIPE_INGREDIENT_CACHE_TTL,
+)
+
+# Rendered `_ingredients.html` keyed by (recipe id, portions, language). The snapshot the fragment was rendered
+# from is stored alongside it, so a fragment is only reused while its snapshot is still the cached one.
+ingredient_fragments: LRUCache[tuple[int, float, str], tuple[RecipeIngredientsSnapshot, str]] = LRUCache(
+    maxsize=settings.RECIPE_FRAGMENT_CACHE_SIZE,
+    ttl=settings.RECIPE_INGREDIENT_CACHE_TTL,
+)
+
+
+# Loads of this worker running for concurrent requests, see ``recipe_viewer.singleflight``. Keys contain the
+# generation of the recipe in `ingredient_snapshots`, so requests made after its invalidation do not join a load
+# started before it.
+recipe_flights: SingleFlight[tuple[int, int], Recipe] = SingleFlight("recipes")
+snapshot_flights: SingleFlight[tuple[int, datetime | None, int], RecipeIngredientsSnapshot] = SingleFlight(
+    "ingredients"
+)
+
+
+async def aget_recipe(recipe_id: int) -> Recipe:
+    """Load a recipe for display, sharing the query with concurrent requests for the same recipe.
+
+    The instance may be shared as well, so callers must not modify it. Raises Http404 if the recipe does not exist.
+    """
+    load = partial(timed_sync_to_async(get_object_or_404, "db", executor="db"), Recipe, id=recipe_id)
+    return await recipe_flights.do((recipe_id, ingredient_snapshots.key_generation(recipe_id)), load)
+
+
+def _load_ingredient_snapshot(
+    recipe_id: int, updated_at: datetime | None, generation: int
+) -> RecipeIngredientsSnapshot:
+    if updated_at is None:
+        updated_at = Recipe.objects.filter(id=recipe_id).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            msg = "No Recipe matches the given query."
+            raise Http404(msg)
+
+    ingredients = tuple(
+        IngredientSnapshot(name=name, quantity=quantity, unit=unit)
+        for name, quantity, unit in Ingredient.objects.filter(recipe_id=recipe_id)
+        .order_by("id")
+        .values_list("name", "quantity", "unit")
+    )
+    snapshot = RecipeIngredientsSnapshot(recipe_id=recipe_id, updated_at=updated_at, ingredients=ingredients)
+    ingredient_snapshots.set(recipe_id, snapshot, generation=generation)
+    return snapshot
+
+
+async def aget_ingredient_snapshot(recipe_id: int, updated_at: datetime | None = None) -> RecipeIngredientsSnapshot:
+    """Return the ingredients of a recipe, served from the cache when possible.
+
+    A hit runs no query. Pass `updated_at` when the recipe has already been loaded to also reject snapshots of an
+    older revision, such as those of recipes changed by other workers. On a miss, concurrent requests for the same
+    revision share one load. Raises Http404 if the recipe does not exist.
+    """
+    snapshot = ingredient_snapshots.get(
+        recipe_id, validate=lambda cached: updated_at is None or cached.updated_at == updated_at
+    )
+    if snapshot is not None:
+        return snapshot
+
+    generation = ingredient_snapshots.generation
+    load = partial(
+        timed_sync_to_async(_load_ingredient_snapshot, "db", executor="db"), recipe_id, updated_at, generation
+    )
+    flight_key = (recipe_id, updated_at, ingredient_snapshots.key_generation(recipe_id))
+    return await snapshot_flights.do(flight_key, load)
+
+
+def render_ingredients_fragment(snapshot: RecipeIngredientsSnapshot, portions: float) -> str:
+    """Render the ingredient list scaled to `portions`, served from the cache when possible."""
+    key = (snapshot.recipe_id, portions, get_language())
+    cached = ingredient_fragments.get(key, validate=lambda entry: entry[0] is snapshot)
+    if cached is not None:
+        return cached[1]
+
+    # Calculate quantities based on portions
+    calculated_ingredients: list[dict[str, Any]] = [
+        {"name": ing.name, "quantity": ing.quantity * portions, "unit": ing.unit} for ing in snapshot.ingredients
+    ]
+    rendered_html = render_to_string("recipes/_ingredients.html", {"ingredients": calculated_ingredients})
+    ingredient_fragments.set(key, (snapshot, rendered_html))
+    return rendered_html
+
+
+def invalidate_recipes(recipe_ids: Iterable[int] | None) -> None:
+    """Drop every cached entry of the given recipes, or of every recipe if `recipe_ids` is None."""
+    if recipe_ids is None:
+        ingredient_snapshots.clear()
+        return
+    for recipe_id in recipe_ids:
+        ingredient_snapshots.delete(recipe_id)
@@ -0,0 +1,60 @@
+"""
+Validators for conditional GET requests of the recipe pages and fragments.
+
+Views derive an ETag from the data they display, usually ``Recipe.updated_at``, and answer ``304 Not Modified``
+before rendering anything when the client already has that version. Responses are marked to be revalidated on
+every use, as pages also differ per user.
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.http import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+from recipe_viewer.apps.accounts.permissions import apermission_key
+
+
+def make_etag(*parts: object) -> str:
+    """Build a weak ETag from `parts` and the active language, weak as nginx compresses responses."""
+    digest = hashlib.md5("|".join(map(str, (*parts, get_language()))).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+async def amake_page_etag(request: HttpRequest, *parts: object) -> str:
+    """Build the ETag of a full page, which also depends on the user and their permissions.
+
+    Pages embed a CSRF token that is only valid with the CSRF cookie it was derived from, so the cookie is part
+    of the ETag as well. The user is stored on the request, so the templates reuse its primed permissions.
+    """
+    user = await request.auser()
+    request.user = user
+    return make_page_etag(request, await apermission_key(user), *parts)
+
+
+def make_page_etag(request: HttpRequest, permission_key: str, *parts: object) -> str:
+    """Build the ETag of a full page for a user whose `apermission_key` is already known."""
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    return make_etag(*parts, permission_key, csrf_cookie)
+
+
+def not_modified(request: HttpRequest, etag: str, last_modified: datetime | None) -> HttpResponseBase | None:
+    """Return a 304 (or 412) response if the client's validators match, None if the view has to respond."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response: HttpResponseBase, etag: str, last_modified: datetime | None) -> HttpResponseBase:
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,9 +1,20 @@
+from collections.abc import Mapping
+from typing import Any
+
 from django import forms
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.deletion import Collector
+from django.forms import BaseInlineFormSet
 from django.forms import inlineformset_factory
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from recipe_viewer.apps.recipes.models import Ingredient
 from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.signals import ingredients_changed
 
 
 class RecipeForm(forms.ModelForm):
@@ -87,11 +98,95 @@ class IngredientForm(forms.ModelForm):
         }
 
 
+class _FetchedObjectChoiceField(forms.ModelChoiceField):
+    """Model choice field resolving submitted primary keys from objects that were already fetched."""
+
+    def __init__(self, *args: Any, objects: Mapping[str, Model], **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.objects = objects
+
+    def to_python(self, value: Any) -> Model | None:
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+            ) from None
+
+
+class BaseIngredientFormSet(BaseInlineFormSet):
+    """Ingredient formset validating and saving submitted rows without one query per row.
+
+    Django validates the hidden primary key of every bound form with its own ``queryset.get()``. Here the
+    submitted keys are looked up among the recipe's ingredients, which the formset fetches once anyway.
+    """
+
+    def save_bulk(self) -> None:
+        """Save the submitted changes like `save`, with one query per kind of change instead of one per row.
+
+        New rows are inserted with one ``bulk_create``, changed rows updated with one ``bulk_update`` and removed
+        rows deleted with one batched delete, all within one transaction. Bulk queries send no signals, so the
+        recipe is marked as changed once afterwards, which also bumps its ``updated_at`` unless it was saved
+        within the same transaction.
+        """
+        deleted_forms = set(self.deleted_forms)
+        self.new_objects = []
+        self.changed_objects = []
+        self.deleted_objects = [form.instance for form in self.initial_forms if form in deleted_forms]
+        changed_fields: set[str] = set()
+        for form in self.initial_forms:
+            if form not in deleted_forms and form.has_changed():
+                self.changed_objects.append((form.instance, form.changed_data))
+                changed_fields.update(form.changed_data)
+        for form in self.extra_forms:
+            if form not in deleted_forms and form.has_changed():
+                setattr(form.instance, self.fk.name, self.instance)
+                self.new_objects.append(form.instance)
+
+        using = router.db_for_write(Ingredient, instance=self.instance)
+        # Without a savepoint of its own the recipe's changes are merged with those of a surrounding transaction
+        with transaction.atomic(using=using, savepoint=False):
+            if self.deleted_objects:
+                # Deleting the fetched instances directly saves the query a queryset would need to collect them
+                collector = Collector(using=using)
+                collector.collect(self.deleted_objects)
+                collector.delete()
+            if self.changed_objects:
+                Ingredient.objects.using(using).bulk_update(
+                    [instance for instance, _fields in self.changed_objects],
+                    sorted(changed_fields),
+                )
+            if self.new_objects:
+                Ingredient.objects.using(using).bulk_create(self.new_objects)
+            if self.changed_objects or self.new_objects:
+                ingredients_changed(self.instance.pk)
+
+    @cached_property
+    def _objects_by_pk(self) -> dict[str, Model]:
+        return {str(instance.pk): instance for instance in self.get_queryset()}
+
+    def add_fields(self, form: forms.Form, index: int | None) -> None:
+        super().add_fields(form, index)
+        pk_name = self._pk_field.name
+        pk_field = form.fields[pk_name]
+        if isinstance(pk_field, forms.ModelChoiceField):
+            form.fields[pk_name] = _FetchedObjectChoiceField(
+                pk_field.queryset,
+                objects=self._objects_by_pk,
+                initial=pk_field.initial,
+                required=False,
+                widget=pk_field.widget,
+            )
+
+
 # Inline formset for managing ingredients within a recipe form
 IngredientFormSet = inlineformset_factory(
     Recipe,
     Ingredient,
     form=IngredientForm,
+    formset=BaseIngredientFormSet,
     extra=0,  # Number of additional empty forms to display
     can_delete=True,
     min_num=1,  # Require at least one ingredient
@@ -0,0 +1,103 @@
+"""
+Resized WebP and JPEG derivatives of uploaded recipe images.
+
+Derivatives are generated once when an image is uploaded (and by the ``generate_image_derivatives`` command for
+existing images) and are recorded on ``Recipe.image_derivatives`` as::
+
+    {
+        "source": "recipes/pancakes.jpg",
+        "card": {"webp": [[400, "recipes/derivatives/42/pancakes/card-400.webp"], ...], "jpeg": [...]},
+        "hero": {"webp": [...], "jpeg": [...]},
+    }
+
+Derivative files belong to a single recipe, whose id is part of their path, even when several recipes share the
+same source image like the generated ones do. Only the files below that path are ever deleted, so records written
+before derivatives were stored per recipe leave their possibly shared files alone.
+"""
+
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Any
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from PIL import ImageOps
+
+# Rendered widths of each variant in CSS pixels, the second width serves 2x displays
+DERIVATIVE_WIDTHS: dict[str, tuple[int, ...]] = {
+    "card": (400, 800),
+    "hero": (1280, 2560),
+}
+DERIVATIVE_FORMATS: dict[str, tuple[str, str]] = {
+    # Key in the derivatives record: (Pillow format, file extension)
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+DERIVATIVE_QUALITY = 80
+
+
+def _derivative_directory(recipe_id: int, source_name: str) -> PurePosixPath:
+    return PurePosixPath(source_name).parent / "derivatives" / str(recipe_id)
+
+
+def _derivative_name(recipe_id: int, source_name: str, variant: str, width: int, extension: str) -> str:
+    stem = PurePosixPath(source_name).stem
+    return str(_derivative_directory(recipe_id, source_name) / stem / f"{variant}-{width}.{extension}")
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=DERIVATIVE_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(recipe_id: int, source_name: str) -> dict[str, Any]:
+    """Generate every derivative of the stored image `source_name` of a recipe and return the derivatives record."""
+    with default_storage.open(source_name, "rb") as source_file, Image.open(source_file) as opened:
+        source_image = ImageOps.exif_transpose(opened)
+        if source_image.mode not in ("RGB", "RGBA"):
+            source_image = source_image.convert("RGBA" if "A" in source_image.getbands() else "RGB")
+
+        record: dict[str, Any] = {"source": source_name}
+        for variant, widths in DERIVATIVE_WIDTHS.items():
+            # Never upscale, an image narrower than every width is only stored at its own width
+            target_widths = sorted({min(width, source_image.width) for width in widths})
+            resized = [
+                source_image.resize((width, max(round(source_image.height * width / source_image.width), 1)))
+                if width < source_image.width
+                else source_image
+                for width in target_widths
+            ]
+
+            record[variant] = {}
+            for key, (image_format, extension) in DERIVATIVE_FORMATS.items():
+                entries: list[list[int | str]] = []
+                for width, image in zip(target_widths, resized, strict=True):
+                    name = _derivative_name(recipe_id, source_name, variant, width, extension)
+                    if default_storage.exists(name):
+                        default_storage.delete(name)
+                    stored_name = default_storage.save(name, ContentFile(_encode(image, image_format)))
+                    entries.append([width, stored_name])
+                record[variant][key] = entries
+    return record
+
+
+def delete_derivatives(recipe_id: int, record: dict[str, Any]) -> None:
+    """Delete the files of the derivatives record of a recipe that belong to it."""
+    if not record.get("source"):
+        return
+    directory = _derivative_directory(recipe_id, record["source"])
+    for variant in DERIVATIVE_WIDTHS:
+        for entries in record.get(variant, {}).values():
+            for _width, name in entries:
+                if PurePosixPath(name).is_relative_to(directory):
+                    default_storage.delete(name)
+
+
+def srcset(record: dict[str, Any], variant: str, key: str) -> str:
+    """Build the `srcset` attribute value of one variant and format of a derivatives record."""
+    entries = record.get(variant, {}).get(key, [])
+    return ", ".join(f"{default_storage.url(name)} {width}w" for width, name in entries)
@@ -0,0 +1,280 @@
+"""
+Helpers shared by the recipe import commands.
+
+The import format is a JSON array of recipe objects, see ``import_recipes_json``. Files are parsed incrementally
+so memory usage does not depend on the size of the dump.
+"""
+
+import hashlib
+import json
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import Any
+from typing import TextIO
+
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+
+from recipe_viewer.apps.recipes.images import delete_derivatives
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.search import rebuild_search_index
+from recipe_viewer.apps.recipes.search import update_search_index
+from recipe_viewer.apps.recipes.signals import recipes_changed_in_bulk
+
+READ_CHUNK_SIZE = 1 << 20  # 1 MiB
+# Entries whose JSON is still incomplete after this many characters are rejected instead of buffering the file
+MAX_ENTRY_SIZE = 16 << 20  # 16 MiB
+# A token cut off by the end of a chunk, like "tru" or "\u00", fails within this many characters of the end
+PARTIAL_TOKEN_SIZE = 16
+
+
+@dataclass(frozen=True, slots=True)
+class IngredientRow:
+    name: str
+    quantity: float
+    unit: str
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeRow:
+    # Optional "id" of the entry, which identifies the recipe across imports
+    external_id: str | None
+    name: str
+    steps: str
+    ingredients: tuple[IngredientRow, ...]
+    # Name of an already stored image file, only set by the synthetic data generator
+    image: str = ""
+
+    @property
+    def content_hash(self) -> str:
+        """Fingerprint of everything that is stored for the recipe."""
+        content = [self.name, self.steps, [[row.name, row.quantity, row.unit] for row in self.ingredients]]
+        return hashlib.sha256(json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()).hexdigest()
+
+
+@dataclass
+class ImportStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    duplicates: int = 0
+    ingredients: int = 0
+
+
+def parse_entry(entry: dict[str, Any]) -> RecipeRow:
+    """Normalize one entry of the import file, whose recipe is identified by its optional "id"."""
+    name = entry.get("name", "").strip()
+    steps = entry.get("steps") or []
+    steps_text = "\n".join(steps) if isinstance(steps, list) else str(steps)
+    return RecipeRow(
+        external_id=str(entry["id"]) if entry.get("id") is not None else None,
+        name=name,
+        steps=steps_text,
+        ingredients=tuple(
+            IngredientRow(
+                name=str(ingredient.get("name", "")).strip(),
+                quantity=float(ingredient.get("quantity") or 0.0),
+                unit=str(ingredient.get("unit", "")).strip(),
+            )
+            for ingredient in entry.get("ingredients") or []
+        ),
+    )
+
+
+class _JsonArrayReader:
+    """Incrementally decode the elements of a JSON array from a text stream."""
+
+    def __init__(self, file: TextIO, chunk_size: int, max_entry_size: int = MAX_ENTRY_SIZE) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_entry_size = max_entry_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+
+    def fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping what has already been consumed."""
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self) -> str | None:
+        """Skip whitespace and return the next character, or None at the end of the file."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return None
+
+    def _may_continue(self, error: json.JSONDecodeError) -> bool:
+        """Whether `error` may be caused by the value continuing beyond the buffer rather than by a syntax error."""
+        if len(self.buffer) - self.position > self.max_entry_size:
+            msg = f"An entry of the JSON array is malformed or larger than {self.max_entry_size} characters: {error}"
+            raise ValueError(msg) from error
+        # Strings are reported at their start, other errors where the buffer ends
+        return error.pos >= len(self.buffer) - PARTIAL_TOKEN_SIZE or error.msg.startswith("Unterminated string")
+
+    def decode(self) -> Any:
+        """Decode the value starting at the current position.
+
+        Syntax errors are raised as soon as they are found, without reading the rest of the file.
+        """
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                # The value continues in the next chunk
+                if not self._may_continue(error) or not self.fill():
+                    raise
+                continue
+            # A number ending close to the end of the buffer might continue in the next chunk, like "1" of "1e-5"
+            if end >= len(self.buffer) - PARTIAL_TOKEN_SIZE and self.fill():
+                continue
+            self.position = end
+            return value
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.peek() != "[":
+            msg = "Expected the file to contain a JSON array."
+            raise ValueError(msg)
+        self.position += 1
+
+        first = True
+        while (char := self.peek()) != "]":
+            if char is None:
+                msg = "Unexpected end of file inside the JSON array."
+                raise ValueError(msg)
+            if not first:
+                if char != ",":
+                    msg = f"Expected ',' or ']' in the JSON array, got {char!r}."
+                    raise ValueError(msg)
+                self.position += 1
+                self.peek()
+            first = False
+            yield self.decode()
+
+
+def iter_json_array(path: Path, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of the top-level JSON array in `path` one at a time.
+
+    Only the element currently being decoded and one read chunk are held in memory. Elements that are malformed
+    or larger than ``MAX_ENTRY_SIZE`` raise ValueError.
+    """
+    with path.open(encoding="utf-8") as file:
+        yield from _JsonArrayReader(file, chunk_size)
+
+
+def wipe_recipes() -> None:
+    """Delete every recipe and ingredient without loading them into memory.
+
+    ``QuerySet.delete`` fetches each row to send the deletion signals, which does not scale to full imports.
+    The files of generated image derivatives are removed and the search index is reset instead.
+    """
+    for recipe_id, derivatives in Recipe.objects.exclude(image="").values_list("id", "image_derivatives").iterator():
+        delete_derivatives(recipe_id, derivatives or {})
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("TRUNCATE recipes_ingredient, recipes_recipe")
+        else:
+            cursor.execute("DELETE FROM recipes_ingredient")
+            cursor.execute("DELETE FROM recipes_recipe")
+    rebuild_search_index()
+    recipes_changed_in_bulk(None)
+
+
+def _build_ingredients(recipes: Iterable[tuple[Recipe, RecipeRow]]) -> list[Ingredient]:
+    return [
+        Ingredient(recipe=recipe, name=ingredient.name, quantity=ingredient.quantity, unit=ingredient.unit)
+        for recipe, row in recipes
+        for ingredient in row.ingredients
+    ]
+
+
+def insert_recipes(rows: Sequence[RecipeRow], stats: ImportStats) -> None:
+    """Insert new recipes with their ingredients."""
+    recipes = Recipe.objects.bulk_create(
+        [
+            Recipe(external_id=row.external_id, content_hash=row.content_hash, name=row.name, steps=row.steps)
+            for row in rows
+        ]
+    )
+    ingredients = Ingredient.objects.bulk_create(_build_ingredients(zip(recipes, rows, strict=True)))
+    # bulk_create does not send post_save, so the search index and the list pages are updated here
+    update_search_index(recipe.pk for recipe in recipes)
+    recipes_changed_in_bulk([])
+    stats.inserted += len(recipes)
+    stats.ingredients += len(ingredients)
+
+
+def upsert_recipes(rows: Sequence[RecipeRow], stats: ImportStats) -> None:
+    """Insert new recipes and rewrite changed ones, matched by their external id and content hash."""
+    existing: dict[str, tuple[int, str]] = {
+        external_id: (recipe_id, content_hash)
+        for external_id, recipe_id, content_hash in Recipe.objects.filter(
+            external_id__in=[row.external_id for row in rows]
+        ).values_list("external_id", "id", "content_hash")
+    }
+
+    new_rows: list[RecipeRow] = []
+    changed: list[tuple[Recipe, RecipeRow]] = []
+    now = timezone.now()
+    for row in rows:
+        if row.external_id not in existing:
+            new_rows.append(row)
+            continue
+        recipe_id, stored_hash = existing[row.external_id]
+        content_hash = row.content_hash
+        if stored_hash == content_hash:
+            stats.unchanged += 1
+            continue
+        recipe = Recipe(id=recipe_id, name=row.name, steps=row.steps, content_hash=content_hash, updated_at=now)
+        changed.append((recipe, row))
+
+    if new_rows:
+        insert_recipes(new_rows, stats)
+    if not changed:
+        return
+
+    changed_ids = [recipe.pk for recipe, _row in changed]
+    # bulk_update does not apply auto_now, updated_at is set explicitly above
+    Recipe.objects.bulk_update([recipe for recipe, _row in changed], ["name", "steps", "content_hash", "updated_at"])
+    with connection.cursor() as cursor:
+        placeholders = ", ".join(["%s"] * len(changed_ids))
+        cursor.execute(f"DELETE FROM recipes_ingredient WHERE recipe_id IN ({placeholders})", changed_ids)  # noqa: S608
+    ingredients = Ingredient.objects.bulk_create(_build_ingredients(changed))
+    update_search_index(changed_ids)
+    recipes_changed_in_bulk(changed_ids)
+    stats.updated += len(changed)
+    stats.ingredients += len(ingredients)
+
+
+def delete_missing_recipes(seen_external_ids: set[str], stats: ImportStats, batch_size: int) -> None:
+    """Delete the imported recipes whose external id did not appear in the import.
+
+    Recipes created through the app have no external id and are never deleted.
+    """
+    missing_ids = [
+        recipe_id
+        for recipe_id, external_id in Recipe.objects.filter(external_id__isnull=False)
+        .values_list("id", "external_id")
+        .iterator()
+        if external_id not in seen_external_ids
+    ]
+    for batch in batched(missing_ids, batch_size):
+        with transaction.atomic():
+            # Deleted through the ORM so the signals clean up the search index, caches and image files
+            Recipe.objects.filter(id__in=batch).delete()
+        stats.deleted += len(batch)
@@ -0,0 +1,111 @@
+"""
+Live updates of open recipe pages.
+
+Every open recipe page keeps a single Datastar stream, which subscribes to three broadcast topics: the topic of its
+recipe, to which the signal handlers publish committed changes, ``ALL_RECIPES_TOPIC`` for changes written in bulk,
+and a topic of its own, to which the page posts its portions. Messages arriving in quick succession are
+coalesced, so a burst of them is rendered once.
+"""
+
+import secrets
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from datastar_py.django import ServerSentEventGenerator
+from django.conf import settings
+from django.db import connections
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import translation
+
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+from recipe_viewer.apps.recipes.cache import aget_ingredient_snapshot
+from recipe_viewer.apps.recipes.cache import aget_recipe
+from recipe_viewer.apps.recipes.cache import render_ingredients_fragment
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.broadcast import get_broadcaster
+
+# Sent on idle streams, so neither proxies nor browsers time them out
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+# Parts of the recipe page that are replaced when the recipe changes
+RECIPE_REGION_TEMPLATES = (
+    "recipes/_recipe_heading.html",
+    "recipes/_recipe_image.html",
+    "recipes/_recipe_steps.html",
+)
+
+# Published once for recipes changed in bulk, like imports, which every stream reloads its recipe for
+ALL_RECIPES_TOPIC = "recipes"
+
+
+def recipe_topic(recipe_id: int) -> str:
+    return f"recipe:{recipe_id}"
+
+
+def page_topic(channel_id: str) -> str:
+    return f"page:{channel_id}"
+
+
+def _render_recipe_regions(recipe: Recipe) -> str:
+    return "".join(render_to_string(template_name, {"recipe": recipe}) for template_name in RECIPE_REGION_TEMPLATES)
+
+
+async def _release_connections() -> None:
+    # Streams outlive their request, so they must not keep the connections its thread opened, e.g. for the session,
+    # while idle. Their own queries run on the database pool.
+    await sync_to_async(connections.close_all)()
+
+
+@dataclass
+class RecipeStream:
+    """Events of the stream of one open recipe page, rendered in the language of the page."""
+
+    recipe: Recipe
+    language: str
+    # Portions requested by the page and those its ingredients were last rendered for
+    portions: float
+    rendered_portions: float = 1.0
+    channel_id: str = field(default_factory=lambda: secrets.token_urlsafe(16))
+
+    async def events(self) -> AsyncGenerator[Any, None]:
+        """Assign the page its channel id, then send the changes of the recipe and portions until it disconnects."""
+        own_topic = page_topic(self.channel_id)
+        topics = (recipe_topic(self.recipe.id), ALL_RECIPES_TOPIC, own_topic)
+        await _release_connections()
+        with get_broadcaster().subscribe(*topics) as subscription, translation.override(self.language):
+            yield ServerSentEventGenerator.patch_signals({"channel": self.channel_id})
+            recipe_changed = False
+            while True:
+                if recipe_changed:
+                    try:
+                        # Every page open on the recipe reloads it at once, sharing one query
+                        recipe = await aget_recipe(self.recipe.id)
+                    except Http404:
+                        yield ServerSentEventGenerator.redirect(reverse("recipe_list"))
+                        return
+                    self.recipe = recipe
+                    rendered_regions = await timed_sync_to_async(_render_recipe_regions, "render", executor="render")(
+                        recipe
+                    )
+                    yield ServerSentEventGenerator.patch_elements(rendered_regions)
+                if recipe_changed or self.portions != self.rendered_portions:
+                    snapshot = await aget_ingredient_snapshot(self.recipe.id, updated_at=self.recipe.updated_at)
+                    self.rendered_portions = self.portions
+                    yield ServerSentEventGenerator.patch_elements(render_ingredients_fragment(snapshot, self.portions))
+
+                messages = await subscription.receive(
+                    settings.RECIPE_STREAM_KEEPALIVE_INTERVAL, settings.RECIPE_STREAM_DEBOUNCE
+                )
+                if not messages:
+                    yield SSE_KEEPALIVE
+                recipe_changed = False
+                for topic, message in messages:
+                    if topic != own_topic:
+                        recipe_changed = True
+                    elif message.get("recipe_id") == self.recipe.id:
+                        self.portions = float(message["portions"])
@@ -0,0 +1,250 @@
+import asyncio
+import html
+import json
+import random
+import re
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.urls import reverse
+
+from recipe_viewer.apps.recipes.benchmark import AsgiDriver
+from recipe_viewer.apps.recipes.benchmark import BenchmarkRequest
+from recipe_viewer.apps.recipes.benchmark import Scenario
+from recipe_viewer.apps.recipes.benchmark import ScenarioResult
+from recipe_viewer.apps.recipes.benchmark import compare_to_baseline
+from recipe_viewer.apps.recipes.benchmark import results_to_json
+from recipe_viewer.apps.recipes.forms import IngredientFormSet
+from recipe_viewer.apps.recipes.forms import RecipeForm
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.asgi import application
+
+SAMPLE_SIZE = 200
+FORM_SAMPLE_SIZE = 20
+NEXT_PAGE_PATTERN = re.compile(r"@get\('([^']+)'\)")
+DATASTAR_HEADERS = {"Datastar-Request": "true"}
+PUBLIC_SCENARIOS = ("recipe_list", "recipe_list_page", "recipe_search", "recipe_detail", "recipe_ingredients")
+AUTHENTICATED_SCENARIOS = ("recipe_change_form", "add_ingredient_form")
+
+
+def _form_data(recipe: Recipe) -> dict[str, Any]:
+    """Build the data the change form of `recipe` posts when an ingredient row is added."""
+    form = RecipeForm(instance=recipe)
+    formset = IngredientFormSet(instance=recipe)
+    data: dict[str, Any] = {"form_action": "add_ingredient", "recipe_id": recipe.pk}
+    for bound_form in [form, formset.management_form, *formset.forms]:
+        for name, form_field in bound_form.fields.items():
+            value = bound_form[name].value()
+            # Files are not posted when only the ingredient rows change
+            if value is not None and not isinstance(form_field, forms.FileField):
+                data[bound_form.add_prefix(name)] = value
+    return data
+
+
+def _login(username: str) -> tuple[str, str]:
+    """Log `username` in and return the Cookie header of the session together with the CSRF header value."""
+    client = Client()
+    client.force_login(get_user_model()._default_manager.get_by_natural_key(username))
+    # Like in a browser, the cookie holds the CSRF secret and the header a masked token
+    request = HttpRequest()
+    csrf_token = get_token(request)
+    cookies = (
+        f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}; "
+        f"{settings.CSRF_COOKIE_NAME}={request.META['CSRF_COOKIE']}"
+    )
+    return cookies, csrf_token
+
+
+def _next_page_url(driver: AsgiDriver) -> str:
+    _status, body, _cookies = asyncio.run(driver.send(BenchmarkRequest("GET", reverse("recipe_list"))))
+    match = NEXT_PAGE_PATTERN.search(body.decode())
+    return html.unescape(match.group(1)) if match else reverse("recipe_list")
+
+
+def _public_scenarios(recipe_ids: list[int], search_terms: list[str], next_page_url: str) -> dict[str, Scenario]:
+    def pick(iteration: int) -> int:
+        return recipe_ids[iteration % len(recipe_ids)]
+
+    path, _separator, query = next_page_url.partition("?")
+    return {
+        "recipe_list": Scenario("recipe_list", lambda _iteration: BenchmarkRequest("GET", reverse("recipe_list"))),
+        "recipe_list_page": Scenario(
+            "recipe_list_page",
+            lambda _iteration: BenchmarkRequest("GET", path, dict(parse_qsl(query)), DATASTAR_HEADERS),
+        ),
+        "recipe_search": Scenario(
+            "recipe_search",
+            lambda iteration: BenchmarkRequest(
+                "GET", reverse("recipe_list"), {"q": search_terms[iteration % len(search_terms)]}
+            ),
+        ),
+        "recipe_detail": Scenario(
+            "recipe_detail",
+            lambda iteration: BenchmarkRequest("GET", reverse("recipe_detail", args=[pick(iteration)])),
+        ),
+        "recipe_ingredients": Scenario(
+            "recipe_ingredients",
+            lambda iteration: BenchmarkRequest(
+                "GET",
+                reverse("recipe_ingredients", args=[pick(iteration)]),
+                {"datastar": json.dumps({"portions": iteration % 8 + 1})},
+                DATASTAR_HEADERS,
+            ),
+        ),
+    }
+
+
+def _authenticated_scenarios(recipe_ids: list[int], cookies: str, csrf_token: str) -> dict[str, Scenario]:
+    form_bodies = [
+        urlencode(_form_data(recipe)).encode()
+        for recipe in Recipe.objects.filter(id__in=recipe_ids[:FORM_SAMPLE_SIZE]).order_by("id")
+    ]
+    session_headers = {"Cookie": cookies}
+    form_headers = {
+        **session_headers,
+        **DATASTAR_HEADERS,
+        "Content-Type": "application/x-www-form-urlencoded",
+        "X-CSRFToken": csrf_token,
+    }
+    return {
+        "recipe_change_form": Scenario(
+            "recipe_change_form",
+            lambda iteration: BenchmarkRequest(
+                "GET",
+                reverse("recipe_change", args=[recipe_ids[iteration % len(recipe_ids)]]),
+                headers=session_headers,
+            ),
+        ),
+        "add_ingredient_form": Scenario(
+            "add_ingredient_form",
+            lambda iteration: BenchmarkRequest(
+                "POST",
+                reverse("add_ingredient_form"),
+                headers=form_headers,
+                body=form_bodies[iteration % len(form_bodies)],
+            ),
+        ),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the hot endpoints by driving the ASGI application in-process at a configurable concurrency.
+
+    Reports throughput, p50/p95/p99 latency and database queries per request for every endpoint. Passing several
+    values to --concurrency runs every endpoint at each of them, showing how throughput scales. Results can
+    be written as JSON with --output and compared against a stored result with --baseline, which fails the
+    command when an endpoint regressed by more than --tolerance.
+
+    --generate wipes the database and loads a seeded synthetic dataset with ``generate_recipes`` first. The
+    form endpoints are only benchmarked when --user names an account allowed to change recipes, the first
+    superuser is used otherwise.
+    """
+
+    help = "Benchmark the recipe endpoints in-process"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint (default: 200)")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[10],
+            help="Concurrent clients, several values benchmark every endpoint at each to show scaling (default: 10)",
+        )
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint (default: 10)")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[*PUBLIC_SCENARIOS, *AUTHENTICATED_SCENARIOS],
+            help="Only benchmark the given endpoint, may be repeated (default: all)",
+        )
+        parser.add_argument("--generate", type=int, help="Wipe the database and generate this many recipes first")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the dataset and request mix (default: 0)")
+        parser.add_argument("--user", help="Email or username used for the form endpoints (default: first superuser)")
+        parser.add_argument("--output", help="Write the results as JSON to this path")
+        parser.add_argument("--baseline", help="Compare against the JSON results stored at this path")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Relative latency and throughput slack allowed against the baseline (default: 0.1)",
+        )
+
+    def _run(self, driver: AsgiDriver, scenarios: list[Scenario], options: dict[str, Any]) -> list[ScenarioResult]:
+        results = []
+        for scenario in scenarios:
+            for concurrency in options["concurrency"]:
+                result = asyncio.run(driver.run(scenario, options["requests"], concurrency, options["warmup"]))
+                results.append(result)
+                self.stdout.write(
+                    f"{scenario.name:<20} x{concurrency:<4} {result.throughput_rps:>8.1f} req/s  "
+                    f"p50 {result.p50_ms:>7.2f}ms  p95 {result.p95_ms:>7.2f}ms  p99 {result.p99_ms:>7.2f}ms  "
+                    f"{result.queries_per_request:>5.1f} queries  {result.errors} errors"
+                )
+        return results
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        if options["generate"]:
+            call_command("generate_recipes", count=options["generate"], seed=options["seed"], wipe=True)
+
+        # The same seed requests the same recipes in the same order on the same dataset
+        rng = random.Random(options["seed"])  # noqa: S311
+        all_ids = list(Recipe.objects.order_by("id").values_list("id", flat=True))
+        if not all_ids:
+            msg = "There are no recipes to benchmark, pass --generate to create a dataset."
+            raise CommandError(msg)
+        recipe_ids = rng.sample(all_ids, min(SAMPLE_SIZE, len(all_ids)))
+        search_terms = [
+            name.split()[1] if len(name.split()) > 1 else name
+            for name in Recipe.objects.filter(id__in=recipe_ids).order_by("id").values_list("name", flat=True)
+        ]
+
+        driver = AsgiDriver(application)
+        scenarios = _public_scenarios(recipe_ids, search_terms, _next_page_url(driver))
+        user_model = get_user_model()
+        username = options["user"] or (
+            user_model.objects.filter(is_superuser=True)
+            .order_by("pk")
+            .values_list(user_model.USERNAME_FIELD, flat=True)
+            .first()
+        )
+        if username:
+            scenarios.update(_authenticated_scenarios(recipe_ids, *_login(username)))
+
+        selected = options["scenario"] or [*PUBLIC_SCENARIOS, *AUTHENTICATED_SCENARIOS]
+        if any(name not in scenarios for name in selected):
+            self.stderr.write(self.style.WARNING("Skipping the form endpoints, there is no user to log in with."))
+
+        results = self._run(driver, [scenarios[name] for name in selected if name in scenarios], options)
+
+        metadata = {
+            "database": connection.vendor,
+            "recipes": Recipe.objects.count(),
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "executors": settings.EXECUTORS,
+            "seed": options["seed"],
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(results_to_json(results, metadata), encoding="utf-8")
+            self.stdout.write(f"Results written to {options['output']}.")
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text(encoding="utf-8"))
+            regressions = compare_to_baseline(results, baseline, options["tolerance"])
+            if regressions:
+                msg = "Performance regressed against the baseline:\n  " + "\n  ".join(regressions)
+                raise CommandError(msg)
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,112 @@
+import gzip
+import json
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import batched
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+from typing import TextIO
+
+from django.core.management.base import BaseCommand
+
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+
+
+def _iter_entries(chunk_size: int) -> Iterator[dict[str, Any]]:
+    """Yield every recipe in the import format, fetching the ingredients of each chunk in one query."""
+    # iterator() streams the recipes through a server-side cursor on PostgreSQL
+    recipes = Recipe.objects.order_by("id").values_list("id", "external_id", "name", "steps")
+    for chunk in batched(recipes.iterator(chunk_size=chunk_size), chunk_size):
+        ingredients = (
+            Ingredient.objects.filter(recipe_id__in=[recipe[0] for recipe in chunk])
+            .order_by("recipe_id", "id")
+            .values_list("recipe_id", "name", "quantity", "unit")
+        )
+        ingredients_by_recipe = {
+            recipe_id: [{"name": name, "quantity": quantity, "unit": unit} for _id, name, quantity, unit in rows]
+            for recipe_id, rows in groupby(ingredients, key=itemgetter(0))
+        }
+        for recipe_id, external_id, name, steps in chunk:
+            entry: dict[str, Any] = {}
+            # Recipes created in the app have no external id, the importer identifies them by their name
+            if external_id is not None:
+                entry["id"] = external_id
+            entry["name"] = name
+            entry["steps"] = steps.split("\n") if steps else []
+            entry["ingredients"] = ingredients_by_recipe.get(recipe_id, [])
+            yield entry
+
+
+@contextmanager
+def _open_output(output: str, *, compress: bool) -> Iterator[TextIO]:
+    if output == "-":
+        if compress:
+            with gzip.open(sys.stdout.buffer, "wt", encoding="utf-8") as file:
+                yield file
+        else:
+            yield sys.stdout
+        return
+    path = Path(output)
+    with gzip.open(path, "wt", encoding="utf-8") if compress else path.open("w", encoding="utf-8") as file:
+        yield file
+
+
+class Command(BaseCommand):
+    """
+    Exports all recipes in the format read by ``import_recipes_json``, or as NDJSON with one recipe per line.
+
+    Recipes are streamed in chunks and the ingredients of each chunk are fetched with a single query, so memory
+    usage does not depend on the number of recipes. Output ending in ``.gz`` is gzip compressed.
+    """
+
+    help = "Export recipes to a JSON or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="Path of the export file, - writes to stdout (default: -)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["json", "ndjson"],
+            default="json",
+            help="json writes an array readable by import_recipes_json, ndjson one recipe per line (default: json)",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the output with gzip (implied by an output path ending in .gz)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of recipes fetched per query (default: 2000)",
+        )
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        output = options["output"]
+        compress = options["gzip"] or output.endswith(".gz")
+        as_array = options["format"] == "json"
+
+        count = 0
+        with _open_output(output, compress=compress) as file:
+            if as_array:
+                file.write("[")
+            for entry in _iter_entries(options["chunk_size"]):
+                if as_array:
+                    file.write(",\n" if count else "\n")
+                file.write(json.dumps(entry, ensure_ascii=False))
+                if not as_array:
+                    file.write("\n")
+                count += 1
+            if as_array:
+                file.write("\n]\n")
+
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} recipes to {output}."))
@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from typing import Any
+
+import django
+from django.core.management.base import BaseCommand
+
+from recipe_viewer.apps.recipes.images import delete_derivatives
+from recipe_viewer.apps.recipes.images import generate_derivatives
+from recipe_viewer.apps.recipes.models import Recipe
+
+
+def _generate(recipe_id: int, image_name: str, previous: dict[str, Any]) -> dict[str, Any]:
+    # Runs in a worker process, which only touches the storage and never the database. The files of each recipe
+    # are its own, so workers never write or delete the same path.
+    delete_derivatives(recipe_id, previous)
+    return generate_derivatives(recipe_id, image_name)
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for existing recipe images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives that are already up to date",
+        )
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        pending = [
+            (recipe_id, image_name, derivatives or {})
+            for recipe_id, image_name, derivatives in Recipe.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .values_list("id", "image", "image_derivatives")
+            .iterator()
+            if options["force"] or (derivatives or {}).get("source") != image_name
+        ]
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("All image derivatives are up to date."))
+            return
+
+        self.stdout.write(f"Generating derivatives for {len(pending)} images using {options['workers']} workers...")
+        done = 0
+        failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as executor:
+            futures = {
+                executor.submit(_generate, recipe_id, image_name, previous): (recipe_id, image_name)
+                for recipe_id, image_name, previous in pending
+            }
+            for future in as_completed(futures):
+                recipe_id, image_name = futures[future]
+                try:
+                    derivatives = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(self.style.ERROR(f"Recipe {recipe_id} ({image_name}): {error}"))
+                    continue
+                # Update the row directly so neither the signals fire nor updated_at changes
+                Recipe.objects.filter(pk=recipe_id).update(image_derivatives=derivatives)
+                done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {done} images ({failed} failed)."))
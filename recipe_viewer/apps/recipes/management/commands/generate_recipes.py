@@ -0,0 +1,177 @@
+import random
+import time
+from collections.abc import Iterator
+from io import BytesIO
+from itertools import batched
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from PIL import Image
+
+from recipe_viewer.apps.recipes.bulkload import load_batches
+from recipe_viewer.apps.recipes.bulkload import secondary_indexes_dropped
+from recipe_viewer.apps.recipes.importing import IngredientRow
+from recipe_viewer.apps.recipes.importing import RecipeRow
+from recipe_viewer.apps.recipes.importing import wipe_recipes
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.search import rebuild_search_index
+
+DEFAULT_UNITS = "g,kg,dag,mg,ml,l,cl,tsp,tbsp,cup,cups,pinch,piece,pieces,slice,clove,can,bunch"
+FOODS = (
+    "flour", "sugar", "brown sugar", "salt", "pepper", "butter", "milk", "cream", "egg", "yolk", "water",
+    "olive oil", "sunflower oil", "vinegar", "honey", "yeast", "baking powder", "baking soda", "vanilla",
+    "cinnamon", "nutmeg", "paprika", "cumin", "oregano", "basil", "parsley", "thyme", "rosemary", "garlic",
+    "onion", "shallot", "leek", "carrot", "celery", "potato", "tomato", "zucchini", "pumpkin", "spinach",
+    "mushroom", "bell pepper", "chili", "lemon", "lime", "orange", "apple", "pear", "banana", "strawberry",
+    "raspberry", "almond", "hazelnut", "walnut", "chocolate", "cocoa", "rice", "pasta", "lentils", "chickpeas",
+    "beef", "pork", "chicken", "bacon", "salmon", "shrimp", "tofu", "parmesan", "mozzarella", "cheddar",
+    "quark", "yogurt", "breadcrumbs", "stock", "white wine", "soy sauce", "mustard", "ginger", "coconut milk",
+)  # fmt: skip
+ADJECTIVES = ("fresh", "dried", "chopped", "grated", "ground", "whole", "sliced", "diced", "soft", "cold")
+DISHES = ("cake", "soup", "stew", "salad", "bread", "pie", "casserole", "curry", "risotto", "dumplings", "tart")
+STEP_WORDS = (
+    "add", "stir", "mix", "combine", "heat", "bake", "boil", "simmer", "fry", "roast", "chop", "slice", "whisk",
+    "fold", "season", "pour", "cover", "rest", "serve", "until", "golden", "soft", "smooth", "minutes", "gently",
+    "the", "and", "with", "into", "over", "in", "a", "bowl", "pan", "pot", "oven", "dough", "sauce", "mixture",
+)  # fmt: skip
+PLACEHOLDER_IMAGES = 8
+# Recipes draw from pools of pre-built steps and ingredients, generating each one individually is the bottleneck
+STEP_POOL_SIZE = 2048
+INGREDIENT_POOL_SIZE = 8192
+
+
+class _RecipeFactory:
+    """Produce reproducible synthetic recipes from a seeded random number generator."""
+
+    def __init__(self, options: dict) -> None:
+        self.rng = random.Random(options["seed"])  # noqa: S311
+        self.seed = options["seed"]
+        self.ingredients = (options["min_ingredients"], options["max_ingredients"], options["mode_ingredients"])
+        self.steps = (options["min_steps"], options["max_steps"])
+        self.step_words = options["step_words"]
+        self.image_ratio = options["image_ratio"]
+        self.units = [unit.strip() for unit in options["units"].split(",") if unit.strip()]
+        self.images: list[str] = []
+        self.step_pool = [self._step() for _ in range(STEP_POOL_SIZE)]
+        self.ingredient_pool = [self._ingredient() for _ in range(INGREDIENT_POOL_SIZE)]
+
+    def _count(self, low: int, high: int, mode: int | None = None) -> int:
+        # Skewed towards the mode like real recipes, which mostly have a handful of ingredients
+        return round(self.rng.triangular(low, high, low if mode is None else mode))
+
+    def _ingredient(self) -> IngredientRow:
+        rng = self.rng
+        name = rng.choice(FOODS)
+        if rng.random() < 0.3:
+            name = f"{rng.choice(ADJECTIVES)} {name}"
+        quantity = rng.choice((0.25, 0.5, 1.0, 2.0, 3.0)) if rng.random() < 0.4 else round(rng.uniform(1, 1000), 1)
+        return IngredientRow(name=name, quantity=quantity, unit=rng.choice(self.units))
+
+    def _step(self) -> str:
+        words = self.rng.choices(STEP_WORDS, k=max(self._count(*self.step_words), 1))
+        return " ".join(words).capitalize() + "."
+
+    def recipe(self, index: int) -> RecipeRow:
+        rng = self.rng
+        name = f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(FOODS)} {rng.choice(DISHES)} {index}"
+        return RecipeRow(
+            external_id=f"synthetic-{self.seed}-{index}",
+            name=name,
+            steps="\n".join(rng.choices(self.step_pool, k=self._count(*self.steps))),
+            ingredients=tuple(rng.choices(self.ingredient_pool, k=self._count(*self.ingredients))),
+            image=rng.choice(self.images) if self.images and rng.random() < self.image_ratio else "",
+        )
+
+    def store_placeholder_images(self) -> None:
+        """Store a few solid color images shared by the recipes that get an image."""
+        for number in range(PLACEHOLDER_IMAGES):
+            name = f"recipes/synthetic/placeholder-{number}.jpg"
+            if not default_storage.exists(name):
+                # A separate generator, so whether the files already exist does not change the recipes
+                color = tuple(random.Random(number).randrange(256) for _ in range(3))  # noqa: S311
+                buffer = BytesIO()
+                Image.new("RGB", (1600, 1000), color).save(buffer, format="JPEG", quality=80)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            self.images.append(name)
+
+    def __call__(self, count: int) -> Iterator[RecipeRow]:
+        for index in range(count):
+            yield self.recipe(index)
+
+
+class Command(BaseCommand):
+    """
+    Generates large amounts of synthetic recipes for load and scale testing.
+
+    The same --seed always produces the same recipes. They are written with the bulk loader used by
+    ``import_recipes_json --bulk-load`` and identified by the external id ``synthetic-<seed>-<n>``. Recipes with
+    an image share a few placeholder files, run ``generate_image_derivatives`` afterwards to create derivatives,
+    which are stored per recipe.
+    """
+
+    help = "Generate synthetic recipes for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000, help="Number of recipes (default: 10000)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator (default: 0)")
+        parser.add_argument("--min-ingredients", type=int, default=2, help="Minimum ingredients per recipe (2)")
+        parser.add_argument("--max-ingredients", type=int, default=25, help="Maximum ingredients per recipe (25)")
+        parser.add_argument("--mode-ingredients", type=int, default=7, help="Most common ingredient count (7)")
+        parser.add_argument("--min-steps", type=int, default=1, help="Minimum steps per recipe (default: 1)")
+        parser.add_argument("--max-steps", type=int, default=15, help="Maximum steps per recipe (default: 15)")
+        parser.add_argument(
+            "--step-words",
+            type=int,
+            nargs=2,
+            default=[5, 40],
+            metavar=("MIN", "MAX"),
+            help="Range of the number of words per step (default: 5 40)",
+        )
+        parser.add_argument(
+            "--image-ratio",
+            type=float,
+            default=0.5,
+            help="Share of recipes that get an image, between 0 and 1 (default: 0.5)",
+        )
+        parser.add_argument("--units", default=DEFAULT_UNITS, help="Comma separated unit vocabulary")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Recipes per batch (default: 5000)")
+        parser.add_argument("--workers", type=int, default=1, help="Loading processes on PostgreSQL (default: 1)")
+        parser.add_argument("--wipe", action="store_true", help="Delete all existing recipes first")
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        if not options["min_ingredients"] <= options["mode_ingredients"] <= options["max_ingredients"]:
+            msg = "--mode-ingredients must lie between --min-ingredients and --max-ingredients."
+            raise CommandError(msg)
+        factory = _RecipeFactory(options)
+        if options["wipe"]:
+            self.stdout.write("Clearing existing recipes and ingredients...")
+            wipe_recipes()
+        elif Recipe.objects.filter(external_id__startswith=f"synthetic-{options['seed']}-").exists():
+            msg = f"Recipes with seed {options['seed']} already exist, pass --wipe or another --seed."
+            raise CommandError(msg)
+        if options["image_ratio"] > 0:
+            factory.store_placeholder_images()
+
+        self.stdout.write(f"Generating {options['count']} recipes with seed {options['seed']}...")
+        started_at = time.monotonic()
+        written = [0, 0]
+
+        def loaded(recipes: int, ingredients: int) -> None:
+            written[0] += recipes
+            written[1] += ingredients
+            self.stdout.write(f"  {written[0]} recipes, {written[1]} ingredients written")
+
+        with secondary_indexes_dropped():
+            load_batches(batched(factory(options["count"]), options["batch_size"]), options["workers"], loaded)
+            self.stdout.write("Rebuilding the search index...")
+            rebuild_search_index()
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {written[0]} recipes with {written[1]} ingredients in {elapsed:.1f}s "
+                f"({written[1] / max(elapsed, 1e-6):.0f} ingredients/s)."
+            )
+        )
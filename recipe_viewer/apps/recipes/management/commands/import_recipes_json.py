@@ -1,11 +1,27 @@
-import json
+import resource
+import time
+from collections.abc import Iterator
+from contextlib import nullcontext
+from itertools import batched
+from itertools import chain
 from pathlib import Path
 
 from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import IntegrityError
 from django.db import transaction
 
-from recipe_viewer.apps.recipes.models import Ingredient
-from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.bulkload import load_batches
+from recipe_viewer.apps.recipes.bulkload import secondary_indexes_dropped
+from recipe_viewer.apps.recipes.importing import ImportStats
+from recipe_viewer.apps.recipes.importing import RecipeRow
+from recipe_viewer.apps.recipes.importing import delete_missing_recipes
+from recipe_viewer.apps.recipes.importing import insert_recipes
+from recipe_viewer.apps.recipes.importing import iter_json_array
+from recipe_viewer.apps.recipes.importing import parse_entry
+from recipe_viewer.apps.recipes.importing import upsert_recipes
+from recipe_viewer.apps.recipes.importing import wipe_recipes
+from recipe_viewer.apps.recipes.search import rebuild_search_index
 
 
 class Command(BaseCommand):
@@ -34,6 +50,21 @@ class Command(BaseCommand):
             ]
         }
     ]
+
+    Recipes may carry an optional "id" that identifies them across imports, which has to be unique within the file.
+
+    The file is parsed incrementally and recipes are inserted in batches, each batch is committed on its own
+    unless --atomic is given. Memory usage therefore does not depend on the size of the file. The existing recipes
+    are only wiped once the first batch has been read, but without --atomic a file that turns out to be malformed
+    further on leaves just the recipes before the error.
+
+    With --upsert the existing recipes are kept: new recipes are inserted, recipes whose content hash changed
+    are rewritten together with their ingredients, unchanged recipes are skipped and previously imported
+    recipes missing from the file are deleted. Every recipe needs an "id" then, entries repeating one are skipped.
+    The ids seen are kept in memory to find the missing recipes.
+
+    With --bulk-load the recipes are written below the ORM (``COPY`` on PostgreSQL) by --workers processes
+    while the secondary indexes are dropped, and the search index is rebuilt once at the end.
     """
 
     help = "Wipe recipes and import from JSON file"
@@ -44,41 +75,126 @@ class Command(BaseCommand):
             default="recipes_dbf.json",
             help="Path to JSON file (default: recipes_dbf.json)",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of recipes inserted and committed per batch (default: 1000)",
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="Run the whole import in a single transaction instead of committing per batch",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Only write new and changed recipes instead of wiping and reloading everything",
+        )
+        parser.add_argument(
+            "--bulk-load",
+            action="store_true",
+            help="Load recipes with COPY and rebuild indexes afterwards instead of inserting through the ORM",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes loading batches in parallel with --bulk-load (default: 1)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):  # noqa: ARG002
         json_path = Path(options["path"])
         if not json_path.exists():
             self.stderr.write(self.style.ERROR(f"File not found: {json_path}"))
             return
+        if options["bulk_load"] and options["upsert"]:
+            msg = "--bulk-load only supports full imports and cannot be combined with --upsert."
+            raise CommandError(msg)
+        if options["bulk_load"] and options["atomic"] and options["workers"] > 1:
+            msg = "--atomic cannot be combined with several --workers, each worker commits its own batches."
+            raise CommandError(msg)
 
-        self.stdout.write("Clearing existing recipes and ingredients...")
-        Recipe.objects.all().delete()
-
-        self.stdout.write(f"Loading recipes from {json_path}...")
-        data = json.loads(json_path.read_text(encoding="utf-8"))
+        stats = ImportStats()
+        write_batch = upsert_recipes if options["upsert"] else insert_recipes
+        started_at = time.monotonic()
 
-        recipe_count = 0
-        ingredient_count = 0
+        with transaction.atomic() if options["atomic"] else nullcontext():
+            self.stdout.write(f"Loading recipes from {json_path}...")
+            seen_external_ids: set[str] = set()
+            rows = (parse_entry(entry) for entry in iter_json_array(json_path))
+            if options["upsert"]:
+                rows = self._unique_rows(rows, seen_external_ids, stats)
+            batches: Iterator[tuple[RecipeRow, ...]] = batched(rows, options["batch_size"])
+            if not options["upsert"]:
+                batches = self._wipe_after_first_batch(batches)
+            try:
+                if options["bulk_load"]:
+                    self._bulk_load(batches, options["workers"], stats, started_at)
+                else:
+                    for batch in batches:
+                        with transaction.atomic():
+                            write_batch(batch, stats)
+                        self._write_progress(stats, started_at)
+            except IntegrityError as error:
+                msg = f"Could not write the recipes, is an id repeated within the file? {error}"
+                raise CommandError(msg) from error
 
-        for entry in data:
-            steps = entry.get("steps") or []
-            steps_text = "\n".join(steps) if isinstance(steps, list) else str(steps)
+            if options["upsert"]:
+                self.stdout.write("Deleting recipes missing from the file...")
+                delete_missing_recipes(seen_external_ids, stats, options["batch_size"])
 
-            recipe = Recipe.objects.create(
-                name=entry.get("name", "").strip(),
-                steps=steps_text,
+        elapsed = time.monotonic() - started_at
+        # ru_maxrss is reported in KiB on Linux
+        peak_memory_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported recipes in {elapsed:.1f}s (peak memory {peak_memory_mib:.0f} MiB): "
+                f"{stats.inserted} inserted, {stats.updated} updated, {stats.unchanged} unchanged, "
+                f"{stats.deleted} deleted, {stats.duplicates} duplicates skipped, "
+                f"{stats.ingredients} ingredients written."
             )
-            recipe_count += 1
-
-            ingredients = entry.get("ingredients") or []
-            for ingredient in ingredients:
-                Ingredient.objects.create(
-                    recipe=recipe,
-                    name=str(ingredient.get("name", "")).strip(),
-                    quantity=float(ingredient.get("quantity") or 0.0),
-                    unit=str(ingredient.get("unit", "")).strip(),
-                )
-                ingredient_count += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Imported {recipe_count} recipes and {ingredient_count} ingredients."))
+        )
+
+    def _bulk_load(
+        self, batches: Iterator[tuple[RecipeRow, ...]], workers: int, stats: ImportStats, started_at: float
+    ) -> None:
+        def loaded(recipes: int, ingredients: int) -> None:
+            stats.inserted += recipes
+            stats.ingredients += ingredients
+            self._write_progress(stats, started_at)
+
+        with secondary_indexes_dropped():
+            load_batches(batches, workers, on_batch_loaded=loaded)
+            # Rebuilt before the indexes are recreated so the search index is only built once
+            self.stdout.write("Rebuilding the search index...")
+            rebuild_search_index()
+
+    def _wipe_after_first_batch(self, batches: Iterator[tuple[RecipeRow, ...]]) -> Iterator[tuple[RecipeRow, ...]]:
+        """Wipe the existing recipes once the first batch has been read, so a file that cannot be read keeps them."""
+        first_batch = next(batches, None)
+        self.stdout.write("Clearing existing recipes and ingredients...")
+        wipe_recipes()
+        return batches if first_batch is None else chain([first_batch], batches)
+
+    def _write_progress(self, stats: ImportStats, started_at: float) -> None:
+        processed = stats.inserted + stats.updated + stats.unchanged
+        elapsed = max(time.monotonic() - started_at, 1e-6)
+        self.stdout.write(
+            f"  {processed} recipes, {stats.ingredients} ingredients written "
+            f"({processed / elapsed:.0f} recipes/s, {stats.ingredients / elapsed:.0f} ingredients/s)"
+        )
+
+    def _unique_rows(
+        self, rows: Iterator[RecipeRow], seen_external_ids: set[str], stats: ImportStats
+    ) -> Iterator[RecipeRow]:
+        """Yield the recipes to upsert, skipping repeated external ids."""
+        for row in rows:
+            if row.external_id is None:
+                msg = f'--upsert requires every recipe to have an "id", "{row.name}" has none.'
+                raise CommandError(msg)
+            if row.external_id in seen_external_ids:
+                stats.duplicates += 1
+                continue
+            seen_external_ids.add(row.external_id)
+            yield row
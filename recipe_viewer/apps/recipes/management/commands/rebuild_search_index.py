@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipe_viewer.apps.recipes.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all recipes"
+
+    def handle(self, *args, **options):  # noqa: ARG002
+        self.stdout.write("Rebuilding the recipe search index...")
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
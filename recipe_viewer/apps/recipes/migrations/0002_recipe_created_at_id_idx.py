@@ -0,0 +1,76 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:26
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ingredient",
+            options={"verbose_name": "Ingredient", "verbose_name_plural": "Ingredients"},
+        ),
+        migrations.AlterModelOptions(
+            name="recipe",
+            options={"verbose_name": "Recipe", "verbose_name_plural": "Recipes"},
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="name",
+            field=models.CharField(max_length=255, verbose_name="Name"),
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="quantity",
+            field=models.FloatField(verbose_name="Quantity"),
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ingredients",
+                to="recipes.recipe",
+                verbose_name="Recipe",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="unit",
+            field=models.CharField(max_length=255, verbose_name="Unit"),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, verbose_name="Created at"),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(blank=True, null=True, upload_to="recipes/", verbose_name="Image"),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="name",
+            field=models.CharField(max_length=255, verbose_name="Name"),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="steps",
+            field=models.TextField(verbose_name="Steps"),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Updated at"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["-created_at", "-id"], name="recipe_created_at_id_idx"),
+        ),
+    ]
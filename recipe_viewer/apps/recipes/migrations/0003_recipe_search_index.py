@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:31
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector",
+    "CREATE INDEX recipe_search_vector_idx ON recipes_recipe USING gin (search_vector)",
+    """
+    UPDATE recipes_recipe AS r SET search_vector =
+        setweight(to_tsvector('simple', r.name), 'A')
+        || setweight(to_tsvector('simple', coalesce(
+            (SELECT string_agg(i.name, ' ') FROM recipes_ingredient AS i WHERE i.recipe_id = r.id), ''
+        )), 'B')
+        || setweight(to_tsvector('simple', r.steps), 'C')
+    """,
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5(
+        name, ingredients, steps, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO recipes_recipe_fts (rowid, name, ingredients, steps)
+    SELECT r.id, r.name,
+        coalesce((SELECT group_concat(i.name, ' ') FROM recipes_ingredient AS i WHERE i.recipe_id = r.id), ''),
+        r.steps
+    FROM recipes_recipe AS r
+    """,
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+]
+
+
+def create_search_index(apps, schema_editor):  # noqa: ARG001
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):  # noqa: ARG001
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0002_recipe_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:31
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0003_recipe_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_derivatives",
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Image derivatives"),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:35
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0004_recipe_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name="Content hash"),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="external_id",
+            field=models.CharField(
+                blank=True, editable=False, max_length=255, null=True, unique=True, verbose_name="External ID"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:03
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0005_recipe_external_id_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["updated_at"], name="recipe_updated_at_idx"),
+        ),
+    ]
@@ -32,10 +32,23 @@ class Recipe(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated at"))
     image = models.ImageField(upload_to="recipes/", null=True, blank=True, verbose_name=_("Image"))
+    # Resized variants of `image`, see recipe_viewer.apps.recipes.images
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False, verbose_name=_("Image derivatives"))
+    # Stable key and content fingerprint of imported recipes, used by `import_recipes_json --upsert`
+    external_id = models.CharField(
+        max_length=255, null=True, blank=True, unique=True, editable=False, verbose_name=_("External ID")
+    )
+    content_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name=_("Content hash"))
 
     class Meta:
         verbose_name = _("Recipe")
         verbose_name_plural = _("Recipes")
+        indexes = [
+            # Backs the keyset pagination of the recipe list (ordered by newest first)
+            models.Index(fields=["-created_at", "-id"], name="recipe_created_at_id_idx"),
+            # Backs the max(updated_at) validator of the recipe list
+            models.Index(fields=["updated_at"], name="recipe_updated_at_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.name
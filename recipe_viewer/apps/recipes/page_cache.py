@@ -0,0 +1,184 @@
+"""
+Cache of the full pages served to anonymous visitors.
+
+Visitors without a session cookie cannot be logged in, so their pages only differ by URL and language and are
+served from the ``"pages"`` cache without touching the database. Every page belongs to a scope, the list pages to
+``"list"`` and a recipe page to ``"recipe:<id>"``, and the keys of its pages contain the scope's current version.
+The signal handlers in ``recipe_viewer.apps.recipes.signals`` replace the versions of the scopes a change affects,
+which orphans exactly their pages. Every key also contains the version of the ``"all"`` scope, which imports and
+other changes written in bulk replace to orphan every page at once. The cache backend is chosen with
+``PAGE_CACHE_BACKEND``: a per-worker cache only sees the invalidations of its own worker, a shared one those of every
+worker using it.
+
+Pages embed a CSRF token that is only valid together with its visitor's cookie, so the token is replaced by a
+placeholder when a page is stored and by a token of the current visitor when it is served. For the same reason,
+concurrent visitors missing the same page can share a single render of it.
+"""
+
+import hashlib
+import logging
+import re
+import uuid
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import HttpResponseBase
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+from recipe_viewer.apps.accounts.permissions import ANONYMOUS_PERMISSION_KEY
+from recipe_viewer.apps.monitoring import metrics
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+from recipe_viewer.apps.recipes.conditional import make_page_etag
+from recipe_viewer.apps.recipes.conditional import not_modified
+from recipe_viewer.apps.recipes.conditional import set_validators
+from recipe_viewer.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CSRF_TOKEN_PATTERN = re.compile(rb'name="csrfmiddlewaretoken" value="([A-Za-z0-9]{64})"')
+CSRF_TOKEN_PLACEHOLDER = b"__page_cache_csrf_token__"
+# Scope whose version is part of every key, replaced when recipes were changed in bulk
+ALL_SCOPE = "all"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPage:
+    content: bytes
+    content_type: str
+    # Passed to `make_page_etag`, so a cached page has the same validators as a rendered one
+    etag_parts: tuple[object, ...]
+    last_modified: datetime | None
+
+
+@dataclass(frozen=True, slots=True)
+class PageLookup:
+    key: str
+    page: CachedPage | None
+
+
+# Renders of missing pages running for concurrent requests, keyed like the pages
+page_renders: SingleFlight[str, CachedPage | None] = SingleFlight("pages")
+
+
+def _version_key(scope: str) -> str:
+    return f"version:{scope}"
+
+
+def _get_versions(*scopes: str) -> list[str]:
+    cache = caches["pages"]
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A version that was evicted must not fall back to one whose pages may still be cached
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _lookup(scope: str, language: str, full_path: str) -> PageLookup | None:
+    try:
+        path_digest = hashlib.md5(full_path.encode(), usedforsecurity=False).hexdigest()
+        version, all_version = _get_versions(scope, ALL_SCOPE)
+        key = f"{scope}:{version}:{all_version}:{language}:{path_digest}"
+        return PageLookup(key, caches["pages"].get(key))
+    except Exception:
+        logger.exception("Looking up the cached page of %s failed", full_path)
+        return None
+
+
+def is_cacheable(request: HttpRequest) -> bool:
+    """Whether `request` is an anonymous request for a full page, without looking up the user."""
+    return (
+        settings.PAGE_CACHE_ENABLED
+        and request.method == "GET"
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "Datastar-Request" not in request.headers
+    )
+
+
+async def alookup_page(request: HttpRequest, scope: str) -> PageLookup | None:
+    """Look up the page requested by `request` within `scope`, None if it must not be cached."""
+    if not is_cacheable(request):
+        return None
+    lookup = await timed_sync_to_async(_lookup, "cache", executor="db")(scope, get_language(), request.get_full_path())
+    if lookup is not None:
+        counter = metrics.CACHE_HITS if lookup.page is not None else metrics.CACHE_MISSES
+        counter.inc(cache="pages")
+    return lookup
+
+
+def serve_page(request: HttpRequest, page: CachedPage) -> HttpResponseBase:
+    """Answer `request` with a cached page, or with 304 if the visitor already has it."""
+    etag = make_page_etag(request, ANONYMOUS_PERMISSION_KEY, *page.etag_parts)
+    if (response := not_modified(request, etag, page.last_modified)) is not None:
+        return response
+    content = page.content.replace(CSRF_TOKEN_PLACEHOLDER, get_token(request).encode())
+    response = HttpResponse(content, content_type=page.content_type)
+    return set_validators(response, etag, page.last_modified)
+
+
+def _store(key: str, page: CachedPage) -> None:
+    try:
+        caches["pages"].set(key, page)
+    except Exception:
+        logger.exception("Storing the cached page %s failed", key)
+
+
+async def astore_page(
+    lookup: PageLookup,
+    response: HttpResponse,
+    etag_parts: tuple[object, ...],
+    last_modified: datetime | None,
+) -> CachedPage | None:
+    """Cache `response` under the key of `lookup`, unless it is specific to the visitor or not a success."""
+    if response.status_code != 200 or response.cookies:
+        return None
+    content = response.content
+    if match := CSRF_TOKEN_PATTERN.search(content):
+        content = content.replace(match.group(1), CSRF_TOKEN_PLACEHOLDER)
+    page = CachedPage(content, response.headers["Content-Type"], etag_parts, last_modified)
+    await timed_sync_to_async(_store, "cache", executor="db")(lookup.key, page)
+    return page
+
+
+async def arender_page(
+    lookup: PageLookup,
+    render: Callable[[], Awaitable[tuple[HttpResponse, tuple[object, ...], datetime | None]]],
+) -> CachedPage | None:
+    """Render and cache the missing page of `lookup` once for every request of it that arrives meanwhile.
+
+    `render` returns the response along with the validators of `astore_page`. It runs for the first request only,
+    so it must not depend on anything of it but the URL and language. Returns None if the response must not be
+    cached, in which case every request has to render its own.
+    """
+
+    async def render_and_store() -> CachedPage | None:
+        response, etag_parts, last_modified = await render()
+        return await astore_page(lookup, response, etag_parts, last_modified)
+
+    return await page_renders.do(lookup.key, render_and_store)
+
+
+def invalidate_pages(recipe_ids: Iterable[int] | None, *, lists: bool) -> None:
+    """Drop the cached pages of the given recipes, and every list page if `lists` is set.
+
+    `recipe_ids` None drops every cached page, for changes written below the ORM like imports.
+    """
+    scopes = [ALL_SCOPE] if recipe_ids is None else [f"recipe:{recipe_id}" for recipe_id in recipe_ids]
+    if lists and recipe_ids is not None:
+        scopes.append("list")
+    if not scopes or not settings.PAGE_CACHE_ENABLED:
+        return
+    try:
+        caches["pages"].set_many({_version_key(scope): uuid.uuid4().hex for scope in scopes}, timeout=None)
+    except Exception:
+        logger.exception("Invalidating the cached pages of %s failed", scopes)
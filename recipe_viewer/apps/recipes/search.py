@@ -0,0 +1,151 @@
+"""
+Full-text search over recipe names, steps and ingredient names.
+
+PostgreSQL keeps a weighted ``tsvector`` in ``recipes_recipe.search_vector`` behind a GIN index, SQLite keeps an
+FTS5 shadow table ``recipes_recipe_fts`` whose rowid is the recipe id. Both are created by migration
+``0003_recipe_search_index`` and are kept in sync through ``update_search_index``, which the signal handlers call
+whenever a recipe or one of its ingredients changes.
+"""
+
+import re
+from collections.abc import Iterable
+
+from django.db import connection
+
+SEARCH_CONFIG = "simple"  # Recipes are written in several languages, so no language specific stemming
+FTS_TABLE = "recipes_recipe_fts"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(query: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(query.lower())
+
+
+def _postgres_query(tokens: list[str]) -> str:
+    # Every token has to match, the last one may be incomplete while the user is typing
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def _sqlite_query(tokens: list[str]) -> str:
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _reindex(recipe_ids: list[int] | None) -> None:
+    """Recompute the index entries of the given recipes, or of every recipe if `recipe_ids` is None."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # The ingredient names are aggregated in one pass instead of a subquery per recipe, which would scan the
+            # ingredients once per recipe while bulk loads have dropped the index on recipe_id
+            if recipe_ids is not None:
+                where, params = "AND r.id = ANY(%s)", [recipe_ids, recipe_ids]
+                ingredient_where = "WHERE recipe_id = ANY(%s)"
+            else:
+                where, params, ingredient_where = "", [], ""
+            cursor.execute(
+                f"""
+                UPDATE recipes_recipe AS r SET search_vector =
+                    setweight(to_tsvector('{SEARCH_CONFIG}', r.name), 'A')
+                    || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(i.names, '')), 'B')
+                    || setweight(to_tsvector('{SEARCH_CONFIG}', r.steps), 'C')
+                FROM recipes_recipe AS rr
+                LEFT JOIN (
+                    SELECT recipe_id, string_agg(name, ' ') AS names FROM recipes_ingredient
+                    {ingredient_where}
+                    GROUP BY recipe_id
+                ) AS i ON i.recipe_id = rr.id
+                WHERE rr.id = r.id {where}
+                """,  # noqa: S608
+                params,
+            )
+        elif connection.vendor == "sqlite":
+            if recipe_ids is not None:
+                placeholders = ", ".join(["%s"] * len(recipe_ids))
+                where, params = f"WHERE r.id IN ({placeholders})", recipe_ids
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", recipe_ids)  # noqa: S608
+            else:
+                where, params = "", []
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")  # noqa: S608
+            cursor.execute(
+                f"""
+                INSERT INTO {FTS_TABLE} (rowid, name, ingredients, steps)
+                SELECT r.id, r.name,
+                    coalesce(
+                        (SELECT group_concat(i.name, ' ') FROM recipes_ingredient AS i WHERE i.recipe_id = r.id), ''
+                    ),
+                    r.steps
+                FROM recipes_recipe AS r
+                {where}
+                """,  # noqa: S608
+                params,
+            )
+
+
+def update_search_index(recipe_ids: Iterable[int]) -> None:
+    """Recompute the search index entries of the given recipes.
+
+    Ids of recipes that no longer exist are removed from the index.
+    """
+    ids = sorted(set(recipe_ids))
+    if ids:
+        _reindex(ids)
+
+
+def rebuild_search_index() -> None:
+    """Recompute the search index for every recipe."""
+    _reindex(None)
+
+
+def search_recipe_ids(query: str, limit: int, offset: int = 0) -> list[int]:
+    """Return the ids of the recipes matching `query`, best match first."""
+    tokens = _tokenize(query)
+    if not tokens:
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"""
+                SELECT id FROM recipes_recipe
+                WHERE search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s)
+                ORDER BY ts_rank_cd(search_vector, to_tsquery('{SEARCH_CONFIG}', %s)) DESC, id DESC
+                LIMIT %s OFFSET %s
+                """,  # noqa: S608
+                [_postgres_query(tokens), _postgres_query(tokens), limit, offset],
+            )
+        elif connection.vendor == "sqlite":
+            # bm25 weights follow the column order: name, ingredients, steps
+            cursor.execute(
+                f"""
+                SELECT rowid FROM {FTS_TABLE}
+                WHERE {FTS_TABLE} MATCH %s
+                ORDER BY bm25({FTS_TABLE}, 10.0, 5.0, 1.0), rowid DESC
+                LIMIT %s OFFSET %s
+                """,  # noqa: S608
+                [_sqlite_query(tokens), limit, offset],
+            )
+        else:
+            return []
+        return [row[0] for row in cursor.fetchall()]
+
+
+def count_search_results(query: str) -> int:
+    """Return the number of recipes matching `query`."""
+    tokens = _tokenize(query)
+    if not tokens:
+        return 0
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                f"SELECT count(*) FROM recipes_recipe WHERE search_vector @@ to_tsquery('{SEARCH_CONFIG}', %s)",  # noqa: S608
+                [_postgres_query(tokens)],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",  # noqa: S608
+                [_sqlite_query(tokens)],
+            )
+        else:
+            return 0
+        return cursor.fetchone()[0]
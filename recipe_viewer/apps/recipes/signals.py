@@ -0,0 +1,163 @@
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from functools import partial
+from typing import Any
+
+from django.db import connection
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipe_viewer.apps.recipes.cache import invalidate_recipes
+from recipe_viewer.apps.recipes.images import delete_derivatives
+from recipe_viewer.apps.recipes.images import generate_derivatives
+from recipe_viewer.apps.recipes.live import ALL_RECIPES_TOPIC
+from recipe_viewer.apps.recipes.live import recipe_topic
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.page_cache import invalidate_pages
+from recipe_viewer.apps.recipes.search import update_search_index
+from recipe_viewer.broadcast import get_broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _RecipesChanged:
+    """On-commit callback refreshing derived data of every recipe touched within the same savepoint.
+
+    Besides the caches and search index, the pages open on the recipes are told about the change.
+    """
+
+    recipe_ids: set[int] = field(default_factory=set)
+    # Whether the recipes themselves changed, which the list pages show, or only their ingredients
+    recipes_changed: bool = False
+
+    def __call__(self) -> None:
+        update_search_index(self.recipe_ids)
+        invalidate_recipes(self.recipe_ids)
+        invalidate_pages(self.recipe_ids, lists=self.recipes_changed)
+        get_broadcaster().publish(
+            [(recipe_topic(recipe_id), {"recipe_id": recipe_id}) for recipe_id in self.recipe_ids]
+        )
+
+
+def _touch_recipe(recipe_id: int) -> None:
+    # Update the row directly, saving the recipe would fire its signals again
+    Recipe.objects.filter(pk=recipe_id).update(updated_at=timezone.now())
+
+
+def _schedule_recipe_changed(recipe_id: int, *, touch: bool = False, recipe_changed: bool = False) -> None:
+    """Reindex the recipe and invalidate its cache entries once the surrounding transaction commits.
+
+    Saving a recipe together with its ingredients fires one signal per row, so the ids are merged into an
+    already pending callback of the same savepoint and every recipe is only processed once.
+
+    `touch` bumps ``updated_at`` for changed ingredients, so the validators and cache entries derived from it
+    change with them. That is skipped when the recipe was already saved or touched in the same savepoint.
+    `recipe_changed` marks changes of the recipe row itself, which also invalidate the cached list pages.
+    """
+    # Atomic blocks without a savepoint of their own are recorded as None and roll back with their parent
+    savepoint_ids = set(connection.savepoint_ids) - {None}
+    for sids, func, _robust in connection.run_on_commit:
+        if isinstance(func, _RecipesChanged) and sids - {None} == savepoint_ids:
+            if touch and recipe_id not in func.recipe_ids:
+                _touch_recipe(recipe_id)
+            func.recipe_ids.add(recipe_id)
+            func.recipes_changed |= recipe_changed
+            return
+    if touch:
+        _touch_recipe(recipe_id)
+    transaction.on_commit(_RecipesChanged({recipe_id}, recipes_changed=recipe_changed))
+
+
+def _all_recipes_changed() -> None:
+    invalidate_recipes(None)
+    invalidate_pages(None, lists=True)
+    get_broadcaster().publish([(ALL_RECIPES_TOPIC, {})])
+
+
+def recipes_changed_in_bulk(recipe_ids: Iterable[int] | None) -> None:
+    """Handle recipes written with bulk queries or raw SQL, which send no signals, once the transaction commits.
+
+    Pass the ids of the changed recipes, an empty list if recipes were only added, which just changes the list
+    pages, or None if any recipe may have changed or been deleted. Callers keep the search index up to date.
+    """
+    if recipe_ids is None:
+        transaction.on_commit(_all_recipes_changed)
+        return
+    recipe_ids = set(recipe_ids)
+
+    def changed() -> None:
+        invalidate_recipes(recipe_ids)
+        invalidate_pages(recipe_ids, lists=True)
+        get_broadcaster().publish([(recipe_topic(recipe_id), {"recipe_id": recipe_id}) for recipe_id in recipe_ids])
+
+    transaction.on_commit(changed)
+
+
+def ingredients_changed(recipe_id: int) -> None:
+    """Handle ingredients of a recipe that were saved with bulk queries, which send no signals."""
+    _schedule_recipe_changed(recipe_id, touch=True)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender: type[Recipe], instance: Recipe, **kwargs: object) -> None:  # noqa: ARG001
+    _schedule_recipe_changed(instance.pk, recipe_changed=True)
+
+
+def _replace_derivatives(recipe_id: int, image_name: str | None, previous: dict[str, Any]) -> None:
+    try:
+        derivatives = generate_derivatives(recipe_id, image_name) if image_name else {}
+    except Exception:
+        # The recipe keeps showing its original image until `generate_image_derivatives` retries
+        logger.exception("Generating the image derivatives of recipe %s failed", recipe_id)
+        return
+    # Update the row directly so neither the signals fire again nor updated_at changes, unless another save
+    # replaced the image meanwhile
+    if not Recipe.objects.filter(pk=recipe_id, image=image_name or "").update(image_derivatives=derivatives):
+        delete_derivatives(recipe_id, derivatives)
+        return
+    delete_derivatives(recipe_id, previous)
+    # Pages rendered since the commit show the original image instead of the derivatives
+    _RecipesChanged({recipe_id}, recipes_changed=True)()
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_changed(sender: type[Recipe], instance: Recipe, **kwargs: object) -> None:  # noqa: ARG001
+    """Generate the image derivatives of a newly uploaded image and drop those of the replaced one.
+
+    Both happen once the new image is committed, so the transaction saving it neither waits for the derivatives
+    nor can roll back to a row whose derivatives were already deleted.
+    """
+    if "image_derivatives" in instance.get_deferred_fields():
+        return
+    image_name = instance.image.name if instance.image else None
+    previous = instance.image_derivatives or {}
+    if previous.get("source") == image_name:
+        return
+    transaction.on_commit(partial(_replace_derivatives, instance.pk, image_name, previous))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_image_deleted(sender: type[Recipe], instance: Recipe, **kwargs: object) -> None:  # noqa: ARG001
+    if "image_derivatives" not in instance.get_deferred_fields():
+        transaction.on_commit(partial(delete_derivatives, instance.pk, instance.image_derivatives or {}))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender: type[Ingredient], instance: Ingredient, **kwargs: object) -> None:  # noqa: ARG001
+    _schedule_recipe_changed(instance.recipe_id, touch=not _deletes_recipes(kwargs.get("origin")))
+
+
+def _deletes_recipes(origin: object) -> bool:
+    # Ingredients deleted along with their recipe leave nothing to touch, whether it was deleted by itself or
+    # with a queryset, like the bulk deletion of the admin
+    return isinstance(origin, Recipe) or (isinstance(origin, QuerySet) and issubclass(origin.model, Recipe))
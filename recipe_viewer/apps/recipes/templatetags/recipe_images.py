@@ -0,0 +1,35 @@
+from typing import Any
+
+from django import template
+from django.core.files.storage import default_storage
+
+from recipe_viewer.apps.recipes.images import srcset
+from recipe_viewer.apps.recipes.models import Recipe
+
+register = template.Library()
+
+# Rendered width of each variant, matching the layout of the recipe list grid and the detail page
+SIZES: dict[str, str] = {
+    "card": "(min-width: 1024px) 400px, (min-width: 768px) 50vw, 100vw",
+    "hero": "(min-width: 1280px) 1280px, 100vw",
+}
+
+
+@register.inclusion_tag("recipes/_recipe_picture.html")
+def recipe_picture(recipe: Recipe, variant: str, css_class: str = "", loading: str = "lazy") -> dict[str, Any]:
+    """Render the image of a recipe as a responsive <picture> using its generated derivatives."""
+    derivatives = recipe.image_derivatives or {}
+    has_derivatives = derivatives.get("source") == recipe.image.name and variant in derivatives
+    fallback_url = recipe.image.url
+    if has_derivatives and derivatives[variant].get("jpeg"):
+        fallback_url = default_storage.url(derivatives[variant]["jpeg"][0][1])
+    return {
+        "recipe": recipe,
+        "src": fallback_url,
+        "css_class": css_class,
+        "loading": loading,
+        "has_derivatives": has_derivatives,
+        "webp_srcset": srcset(derivatives, variant, "webp") if has_derivatives else "",
+        "jpeg_srcset": srcset(derivatives, variant, "jpeg") if has_derivatives else "",
+        "sizes": SIZES[variant],
+    }
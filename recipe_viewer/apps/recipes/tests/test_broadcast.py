@@ -0,0 +1,112 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from psycopg import Notify
+
+from recipe_viewer.apps.recipes.live import page_topic
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.broadcast import NOTIFY_BATCH_SIZE
+from recipe_viewer.broadcast import PostgresBroadcaster
+
+
+class FakeListenConnection:
+    """Stands in for the psycopg connection a worker listens on, receiving `payloads` once it listens."""
+
+    def __init__(self, payloads: list[str]) -> None:
+        self.payloads = payloads
+        self.executed: list[object] = []
+
+    async def __aenter__(self) -> "FakeListenConnection":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    async def execute(self, query: object) -> None:
+        self.executed.append(query)
+
+    async def notifies(self):  # noqa: ANN201
+        for payload in self.payloads:
+            yield Notify("recipe_viewer", payload, 1)
+        # A listening connection waits for further notifications until it is closed
+        await asyncio.Event().wait()
+
+
+def _payload(topic: str, message: dict) -> str:
+    return json.dumps({"topic": topic, "message": message})
+
+
+class PostgresBroadcasterTests(TestCase):
+    def test_publish_sends_batched_notifications(self) -> None:
+        broadcaster = PostgresBroadcaster()
+        messages = [(f"recipe:{number}", {"recipe_id": number}) for number in range(NOTIFY_BATCH_SIZE + 1)]
+        with mock.patch("recipe_viewer.broadcast.connection") as connection:
+            broadcaster.publish(messages)
+
+        cursor = connection.cursor.return_value.__enter__.return_value
+        assert cursor.execute.call_count == 2
+        statement, params = cursor.execute.call_args_list[0].args
+        assert statement.count("pg_notify(%s, %s)") == NOTIFY_BATCH_SIZE
+        assert params[:2] == ["recipe_viewer", '{"topic":"recipe:0","message":{"recipe_id":0}}']
+
+    async def test_listening_dispatches_notifications_to_subscriptions(self) -> None:
+        broadcaster = PostgresBroadcaster()
+        listener = FakeListenConnection(["not json", _payload("recipe:1", {"recipe_id": 1}), _payload("recipe:2", {})])
+        with (
+            mock.patch("psycopg.AsyncConnection.connect", mock.AsyncMock(return_value=listener)),
+            broadcaster.subscribe("recipe:1") as subscription,
+        ):
+            messages = await subscription.receive(timeout=1)
+            broadcaster._listener.cancel()  # noqa: SLF001
+
+        assert messages == [("recipe:1", {"recipe_id": 1})]
+        assert len(listener.executed) == 1
+        assert "LISTEN" in repr(listener.executed[0])
+
+
+class RecipePortionsBroadcastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.recipe = Recipe.objects.create(name="Pancakes", steps="Mix.\nFry.")
+        Ingredient.objects.create(recipe=cls.recipe, name="Flour", quantity=200, unit="g")
+
+    def setUp(self) -> None:
+        self.broadcaster = PostgresBroadcaster()
+        patches = [
+            mock.patch("recipe_viewer.apps.recipes.views.get_broadcaster", return_value=self.broadcaster),
+            mock.patch.object(self.broadcaster, "_listen", mock.AsyncMock()),
+            mock.patch.object(self.broadcaster, "publish"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def _post_portions(self, channel: str) -> object:
+        return await self.async_client.post(
+            reverse("recipe_portions", kwargs={"recipe_id": self.recipe.id}),
+            data={"portions": 2, "channel": channel},
+            content_type="application/json",
+            headers={"Datastar-Request": "true"},
+        )
+
+    async def test_portions_reach_a_stream_of_this_worker_without_notify(self) -> None:
+        with self.broadcaster.subscribe(page_topic("open")) as subscription:
+            response = await self._post_portions("open")
+            messages = await subscription.receive(timeout=1)
+
+        assert response.status_code == 204
+        assert messages == [(page_topic("open"), {"recipe_id": self.recipe.id, "portions": 2.0})]
+        self.broadcaster.publish.assert_not_called()
+
+    async def test_portions_of_another_stream_are_notified_and_answered(self) -> None:
+        response = await self._post_portions("elsewhere")
+
+        self.broadcaster.publish.assert_called_once_with(
+            [(page_topic("elsewhere"), {"recipe_id": self.recipe.id, "portions": 2.0})]
+        )
+        assert response.status_code == 200
+        assert b"Flour" in b"".join(response.streaming_content)
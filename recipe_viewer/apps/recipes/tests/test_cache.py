@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.utils import timezone
+
+from recipe_viewer.apps.recipes.cache import aget_ingredient_snapshot
+from recipe_viewer.apps.recipes.cache import invalidate_recipes
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.caching import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_invalidating_a_key_discards_its_loads_in_flight(self) -> None:
+        cache: LRUCache[int, str] = LRUCache(maxsize=8, ttl=60)
+        generation = cache.generation
+        cache.delete(1)
+        cache.set(1, "loaded before the invalidation", generation)
+
+        assert cache.get(1) is None
+
+    def test_invalidating_other_keys_keeps_loads_in_flight(self) -> None:
+        cache: LRUCache[int, str] = LRUCache(maxsize=8, ttl=60)
+        generation = cache.generation
+        cache.delete(2)
+        cache.set(1, "loaded", generation)
+
+        assert cache.get(1) == "loaded"
+
+    def test_forgotten_invalidations_discard_older_loads(self) -> None:
+        cache: LRUCache[int, str] = LRUCache(maxsize=2, ttl=60)
+        generation = cache.generation
+        for key in range(4):
+            cache.delete(key)
+        cache.set(0, "loaded before the invalidation", generation)
+        cache.set(1, "loaded before the invalidation", generation)
+
+        assert cache.get(0) is None
+        assert cache.get(1) is None
+
+
+class IngredientSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.recipe = Recipe.objects.create(name="Pancakes", steps="Mix.\nFry.")
+        Ingredient.objects.create(recipe=cls.recipe, name="Flour", quantity=200, unit="g")
+
+    def setUp(self) -> None:
+        invalidate_recipes(None)
+
+    async def test_snapshots_of_an_older_revision_are_reloaded(self) -> None:
+        cached = await aget_ingredient_snapshot(self.recipe.id)
+        # Bulk queries send no signals, like changes saved by another worker
+        await Ingredient.objects.filter(recipe=self.recipe).aupdate(quantity=300)
+        updated_at = timezone.now() + timedelta(seconds=1)
+        await Recipe.objects.filter(pk=self.recipe.id).aupdate(updated_at=updated_at)
+
+        snapshot = await aget_ingredient_snapshot(self.recipe.id, updated_at=updated_at)
+
+        assert cached.ingredients[0].quantity == 200
+        assert snapshot.ingredients[0].quantity == 300
+
+    async def test_invalidated_snapshots_are_reloaded(self) -> None:
+        await aget_ingredient_snapshot(self.recipe.id)
+        await Ingredient.objects.filter(recipe=self.recipe).aupdate(quantity=300)
+        invalidate_recipes([self.recipe.id])
+
+        snapshot = await aget_ingredient_snapshot(self.recipe.id)
+
+        assert snapshot.ingredients[0].quantity == 300
+
+    def test_cached_snapshots_are_served_without_queries(self) -> None:
+        cached = async_to_sync(aget_ingredient_snapshot)(self.recipe.id)
+
+        with self.assertNumQueries(0):
+            snapshot = async_to_sync(aget_ingredient_snapshot)(self.recipe.id)
+
+        assert snapshot is cached
@@ -0,0 +1,73 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.test import TestCase
+
+from recipe_viewer.apps.recipes.importing import _JsonArrayReader
+from recipe_viewer.apps.recipes.models import Recipe
+
+
+class CountingReader(io.StringIO):
+    """Text stream counting the characters read from it."""
+
+    read_size = 0
+
+    def read(self, size: int | None = -1) -> str:
+        chunk = super().read(size)
+        self.read_size += len(chunk)
+        return chunk
+
+
+def _entry(number: int) -> str:
+    return json.dumps({"name": f"Recipe {number}", "steps": ["Mix."], "ingredients": []})
+
+
+class JsonArrayReaderTests(SimpleTestCase):
+    def test_entries_spanning_chunks_are_decoded(self) -> None:
+        file = io.StringIO(f"[{_entry(1)}, {_entry(2)}, 1e-5, true]")
+
+        assert list(_JsonArrayReader(file, chunk_size=3)) == [json.loads(_entry(1)), json.loads(_entry(2)), 1e-5, True]
+
+    def test_syntax_errors_are_raised_without_reading_the_rest_of_the_file(self) -> None:
+        entries = ", ".join(_entry(number) for number in range(1000))
+        file = CountingReader(f'[{{"name": "Broken" "steps": []}}, {entries}]')
+
+        with self.assertRaises(ValueError):  # noqa: PT027
+            list(_JsonArrayReader(file, chunk_size=64))
+
+        assert file.read_size <= 128
+
+    def test_entries_larger_than_the_limit_are_rejected(self) -> None:
+        file = CountingReader(f'[{{"name": "{"x" * 10_000}"}}]')
+
+        with self.assertRaises(ValueError):  # noqa: PT027
+            list(_JsonArrayReader(file, chunk_size=64, max_entry_size=1000))
+
+        assert file.read_size <= 1100
+
+
+class ImportRecipesJsonTests(TestCase):
+    def _import(self, content: str, *args: str) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "recipes.json"
+            path.write_text(content, encoding="utf-8")
+            call_command("import_recipes_json", "--path", str(path), *args, stdout=io.StringIO())
+
+    def test_a_malformed_file_keeps_the_existing_recipes(self) -> None:
+        Recipe.objects.create(name="Pancakes", steps="Mix.\nFry.")
+
+        with self.assertRaises(ValueError):  # noqa: PT027
+            self._import(f'[{_entry(1)}, {{"name": }}]')
+
+        assert list(Recipe.objects.values_list("name", flat=True)) == ["Pancakes"]
+
+    def test_a_valid_file_replaces_the_existing_recipes(self) -> None:
+        Recipe.objects.create(name="Pancakes", steps="Mix.\nFry.")
+
+        self._import(f"[{_entry(1)}, {_entry(2)}]", "--batch-size", "1")
+
+        assert sorted(Recipe.objects.values_list("name", flat=True)) == ["Recipe 1", "Recipe 2"]
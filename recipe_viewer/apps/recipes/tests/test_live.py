@@ -0,0 +1,30 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+
+from recipe_viewer.apps.recipes.models import Recipe
+
+
+class RecipeStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.recipe = Recipe.objects.create(name="Pancakes", steps="Mix.\nFry.")
+
+    async def test_connections_of_the_request_thread_are_closed_once_streaming_begins(self) -> None:
+        closed_on: list[threading.Thread] = []
+        # The test database cannot be closed, so the closing is recorded instead
+        with mock.patch("recipe_viewer.apps.recipes.live.connections") as connections:
+            connections.close_all.side_effect = lambda: closed_on.append(threading.current_thread())
+            response = await self.async_client.get(reverse("recipe_stream", kwargs={"recipe_id": self.recipe.id}))
+            assert closed_on == []
+
+            first_event = await anext(aiter(response.streaming_content))
+            await response.streaming_content.aclose()
+
+        # Synchronous code of the request runs on the thread that `sync_to_async` picks for this test as well
+        request_thread = await sync_to_async(threading.current_thread)()
+        assert b"channel" in first_event
+        assert closed_on == [request_thread]
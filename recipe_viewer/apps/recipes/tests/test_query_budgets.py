@@ -0,0 +1,159 @@
+from django.contrib.auth.models import Permission
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from recipe_viewer.apps.accounts.models import User
+from recipe_viewer.apps.monitoring.queries import QueryBudgetExceeded
+from recipe_viewer.apps.recipes.cache import invalidate_recipes
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+
+DATASTAR_HEADERS = {"Datastar-Request": "true"}
+
+
+async def _content(response: HttpResponse) -> bytes:
+    """Consume the response, which keeps the queries of streaming responses recorded until it is."""
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        return b"".join([chunk async for chunk in response.streaming_content])
+    return b"".join(response.streaming_content)
+
+
+class QueryBudgetTests(TestCase):
+    """Requests to every URL name with a query budget, checked against it by `manage.py test --query-budgets`.
+
+    The user is logged in without being a superuser, so the budgets cover the session, user and permission lookups
+    of the views.
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = User.objects.create_user("cook@example.com", password="unused")  # noqa: S106
+        cls.user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["add_recipe", "change_recipe"], content_type__app_label="recipes")
+        )
+        cls.recipes = Recipe.objects.bulk_create(
+            Recipe(name=f"Recipe {number}", steps="Mix.\nBake.") for number in range(3)
+        )
+        cls.recipe = cls.recipes[0]
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(recipe=cls.recipe, name=name, quantity=quantity, unit="g")
+            for name, quantity in [("Flour", 200), ("Sugar", 50), ("Butter", 100)]
+        )
+
+    def setUp(self) -> None:
+        # Recipes cached by an earlier test would spare the queries the budgets are meant to cover
+        invalidate_recipes(None)
+        self.async_client.force_login(self.user)
+
+    def _form_data(self, name: str, ingredients: list[Ingredient] | None = None) -> dict[str, str]:
+        ingredients = ingredients or []
+        data = {
+            "name": name,
+            "steps": "Mix.\nBake.",
+            "ingredients-TOTAL_FORMS": str(len(ingredients) + 1),
+            "ingredients-INITIAL_FORMS": str(len(ingredients)),
+            "ingredients-MIN_NUM_FORMS": "0",
+            "ingredients-MAX_NUM_FORMS": "1000",
+        }
+        for index, ingredient in enumerate([*ingredients, None]):
+            data |= {
+                f"ingredients-{index}-id": str(ingredient.id) if ingredient else "",
+                f"ingredients-{index}-name": ingredient.name if ingredient else "Eggs",
+                f"ingredients-{index}-quantity": str(ingredient.quantity * 2) if ingredient else "2",
+                f"ingredients-{index}-unit": "g" if ingredient else "pieces",
+            }
+        return data
+
+    async def test_recipe_list(self) -> None:
+        response = await self.async_client.get(reverse("recipe_list"))
+
+        assert response.status_code == 200
+        assert b"Recipe 2" in await _content(response)
+
+    async def test_recipe_list_search(self) -> None:
+        response = await self.async_client.get(reverse("recipe_list"), {"q": "Recipe"})
+
+        assert response.status_code == 200
+        await _content(response)
+
+    async def test_recipe_detail(self) -> None:
+        response = await self.async_client.get(reverse("recipe_detail", kwargs={"recipe_id": self.recipe.id}))
+
+        assert response.status_code == 200
+        assert b"Butter" in await _content(response)
+
+    async def test_recipe_ingredients(self) -> None:
+        response = await self.async_client.get(
+            reverse("recipe_ingredients", kwargs={"recipe_id": self.recipe.id}), headers=DATASTAR_HEADERS
+        )
+
+        assert response.status_code == 200
+        assert b"Flour" in await _content(response)
+
+    @override_settings(QUERY_BUDGETS_ENABLED=True, QUERY_BUDGETS_STRICT=True, QUERY_BUDGETS={"recipe_ingredients": 0})
+    async def test_recipe_ingredients_cached(self) -> None:
+        url = reverse("recipe_ingredients", kwargs={"recipe_id": self.recipe.id})
+        with override_settings(QUERY_BUDGETS={}):
+            await _content(await self.async_client.get(url, headers=DATASTAR_HEADERS))
+
+        response = await self.async_client.get(url, headers=DATASTAR_HEADERS)
+
+        assert response.status_code == 200
+        assert b"Flour" in await _content(response)
+
+    async def test_recipe_portions(self) -> None:
+        response = await self.async_client.post(
+            reverse("recipe_portions", kwargs={"recipe_id": self.recipe.id}),
+            data={"portions": 2},
+            content_type="application/json",
+            headers=DATASTAR_HEADERS,
+        )
+
+        assert response.status_code == 200
+        assert b"Sugar" in await _content(response)
+
+    async def test_recipe_create(self) -> None:
+        response = await self.async_client.get(reverse("recipe_create"))
+
+        assert response.status_code == 200
+        await _content(response)
+
+    async def test_recipe_create_saves(self) -> None:
+        response = await self.async_client.post(reverse("recipe_create"), self._form_data("Pancakes"))
+
+        assert response.status_code == 302
+        assert await Ingredient.objects.filter(recipe__name="Pancakes", name="Eggs").aexists()
+
+    async def test_recipe_change(self) -> None:
+        response = await self.async_client.get(reverse("recipe_change", kwargs={"recipe_id": self.recipe.id}))
+
+        assert response.status_code == 200
+        assert b"Butter" in await _content(response)
+
+    async def test_recipe_change_saves(self) -> None:
+        response = await self.async_client.post(
+            reverse("recipe_change", kwargs={"recipe_id": self.recipe.id}),
+            self._form_data("Cake", self.ingredients),
+        )
+
+        assert response.status_code == 303
+        assert await Ingredient.objects.filter(recipe=self.recipe).acount() == len(self.ingredients) + 1
+
+    async def test_add_ingredient_form(self) -> None:
+        response = await self.async_client.post(
+            reverse("add_ingredient_form"),
+            {"form_action": "add_ingredient", "ingredients-TOTAL_FORMS": "3"},
+            headers=DATASTAR_HEADERS,
+        )
+
+        assert response.status_code == 200
+        assert b"ingredients-3-name" in await _content(response)
+
+    @override_settings(QUERY_BUDGETS_ENABLED=True, QUERY_BUDGETS_STRICT=True, QUERY_BUDGETS={"recipe_detail": 1})
+    async def test_exceeding_a_budget_fails_the_request(self) -> None:
+        with self.assertRaises(QueryBudgetExceeded):  # noqa: PT027
+            await self.async_client.get(reverse("recipe_detail", kwargs={"recipe_id": self.recipe.id}))
@@ -0,0 +1,37 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.models import Recipe
+
+
+def _updates(context: CaptureQueriesContext) -> list[str]:
+    return [query["sql"] for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+
+
+class IngredientChangedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.recipes = [Recipe.objects.create(name=f"Recipe {number}", steps="Mix.") for number in range(3)]
+        for recipe in cls.recipes:
+            Ingredient.objects.create(recipe=recipe, name="Flour", quantity=200, unit="g")
+
+    def test_deleting_recipes_with_a_queryset_does_not_touch_them(self) -> None:
+        with CaptureQueriesContext(connection) as context:
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in self.recipes]).delete()
+
+        assert not Recipe.objects.exists()
+        assert _updates(context) == []
+
+    def test_deleting_a_recipe_does_not_touch_it(self) -> None:
+        with CaptureQueriesContext(connection) as context:
+            self.recipes[0].delete()
+
+        assert _updates(context) == []
+
+    def test_deleting_ingredients_touches_their_recipe(self) -> None:
+        with CaptureQueriesContext(connection) as context:
+            Ingredient.objects.filter(recipe=self.recipes[0]).delete()
+
+        assert len(_updates(context)) == 1
@@ -1,7 +1,3 @@
-from collections.abc import Callable
-from typing import cast
-
-from django.http import HttpResponseBase
 from django.urls import path
 
 from recipe_viewer.apps.recipes.views import RecipeChangeView
@@ -9,13 +5,15 @@ from recipe_viewer.apps.recipes.views import RecipeCreateView
 from recipe_viewer.apps.recipes.views import RecipeDetailView
 from recipe_viewer.apps.recipes.views import add_ingredient_form
 from recipe_viewer.apps.recipes.views import recipe_ingredients
-
-recipe_ingredients_view = cast(Callable[..., HttpResponseBase], recipe_ingredients)
+from recipe_viewer.apps.recipes.views import recipe_portions
+from recipe_viewer.apps.recipes.views import recipe_stream
 
 urlpatterns = [
     path("create/", RecipeCreateView.as_view(), name="recipe_create"),
     path("create/add-ingredient-form/", add_ingredient_form, name="add_ingredient_form"),
     path("<int:recipe_id>/", RecipeDetailView.as_view(), name="recipe_detail"),
     path("<int:recipe_id>/change/", RecipeChangeView.as_view(), name="recipe_change"),
-    path("<int:recipe_id>/ingredients/", recipe_ingredients_view, name="recipe_ingredients"),
+    path("<int:recipe_id>/ingredients/", recipe_ingredients, name="recipe_ingredients"),
+    path("<int:recipe_id>/stream/", recipe_stream, name="recipe_stream"),
+    path("<int:recipe_id>/portions/", recipe_portions, name="recipe_portions"),
 ]
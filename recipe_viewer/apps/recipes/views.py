@@ -1,5 +1,8 @@
 import math
+import re
 from collections.abc import AsyncGenerator
+from datetime import datetime
+from functools import partial
 from typing import Any
 from typing import cast
 
@@ -7,9 +10,14 @@ from asgiref.sync import sync_to_async
 from datastar_py.consts import ElementPatchMode
 from datastar_py.django import DatastarResponse
 from datastar_py.django import ServerSentEventGenerator
-from datastar_py.django import datastar_response
 from datastar_py.django import read_signals
-from django.forms.models import BaseInlineFormSet
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Q
+from django.forms.formsets import TOTAL_FORM_COUNT
+from django.forms.formsets import ManagementForm
 from django.http import HttpRequest
 from django.http import HttpResponse
 from django.http import HttpResponseBadRequest
@@ -18,21 +26,47 @@ from django.shortcuts import redirect
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.http import urlsafe_base64_decode
+from django.utils.http import urlsafe_base64_encode
+from django.utils.translation import get_language
 from django.views import View
 from django.views.decorators.http import require_http_methods
 
+from recipe_viewer.apps.accounts.permissions import aprime_permissions
+from recipe_viewer.apps.monitoring.timing import timed
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+from recipe_viewer.apps.recipes.cache import aget_ingredient_snapshot
+from recipe_viewer.apps.recipes.cache import aget_recipe
+from recipe_viewer.apps.recipes.cache import render_ingredients_fragment
+from recipe_viewer.apps.recipes.conditional import amake_page_etag
+from recipe_viewer.apps.recipes.conditional import make_etag
+from recipe_viewer.apps.recipes.conditional import not_modified
+from recipe_viewer.apps.recipes.conditional import set_validators
+from recipe_viewer.apps.recipes.forms import BaseIngredientFormSet
 from recipe_viewer.apps.recipes.forms import IngredientFormSet
 from recipe_viewer.apps.recipes.forms import RecipeForm
-from recipe_viewer.apps.recipes.models import Ingredient
+from recipe_viewer.apps.recipes.live import RecipeStream
+from recipe_viewer.apps.recipes.live import page_topic
 from recipe_viewer.apps.recipes.models import Recipe
+from recipe_viewer.apps.recipes.page_cache import alookup_page
+from recipe_viewer.apps.recipes.page_cache import arender_page
+from recipe_viewer.apps.recipes.page_cache import astore_page
+from recipe_viewer.apps.recipes.page_cache import serve_page
+from recipe_viewer.apps.recipes.search import count_search_results
+from recipe_viewer.apps.recipes.search import search_recipe_ids
+from recipe_viewer.broadcast import get_broadcaster
 
+# Columns rendered by the recipe cards of the list page, the steps can be arbitrarily large
+RECIPE_CARD_FIELDS = ("id", "name", "image", "image_derivatives", "created_at")
 
-def _build_recipe_forms(request: HttpRequest, recipe: Recipe | None = None) -> tuple[RecipeForm, BaseInlineFormSet]:
+
+def _build_recipe_forms(request: HttpRequest, recipe: Recipe | None = None) -> tuple[RecipeForm, BaseIngredientFormSet]:
     data = request.POST or None
     files = request.FILES or None
     form = RecipeForm(data=data, files=files, instance=recipe)
     formset_instance = recipe or Recipe()
-    ingredient_formset: BaseInlineFormSet = IngredientFormSet(
+    ingredient_formset: BaseIngredientFormSet = IngredientFormSet(
         data=data,
         files=files,
         instance=formset_instance,
@@ -40,15 +74,24 @@ def _build_recipe_forms(request: HttpRequest, recipe: Recipe | None = None) -> t
     return form, ingredient_formset
 
 
+def _save_recipe_forms(form: RecipeForm, ingredient_formset: BaseIngredientFormSet) -> Recipe:
+    """Save a recipe together with its ingredients, so a failure leaves neither half-saved."""
+    with transaction.atomic():
+        recipe = form.save()
+        ingredient_formset.instance = recipe
+        ingredient_formset.save_bulk()
+    return recipe
+
+
 async def _user_has_any_permission(request: HttpRequest, *permissions: str) -> bool:
-    user = await request.auser()
-    is_authenticated = bool(getattr(user, "is_authenticated", False))
-    if not is_authenticated:
-        return False
-    for permission in permissions:
-        if await user.ahas_perm(permission):
-            return True
-    return False
+    with timed("auth"):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return False
+        # Share the user with the templates, so they check against the same primed permissions
+        request.user = user
+        await aprime_permissions(user)
+        return any(user.has_perm(permission) for permission in permissions)
 
 
 def _normalize_portions(signals: dict[str, Any] | None) -> float:
@@ -68,7 +111,7 @@ def _normalize_portions(signals: dict[str, Any] | None) -> float:
 async def _render_recipe_form(
     request: HttpRequest,
     form: RecipeForm,
-    ingredient_formset: BaseInlineFormSet,
+    ingredient_formset: BaseIngredientFormSet,
     recipe: Recipe | None = None,
     status: int = 200,
     action_url: str | None = None,
@@ -81,7 +124,7 @@ async def _render_recipe_form(
         "form_action": action_url or request.path,
         "cancel_url": cancel_url or reverse("recipe_list"),
     }
-    return await sync_to_async(render)(
+    return await timed_sync_to_async(render, "render", executor="render")(
         request=request,
         template_name="recipes/recipe_form.html",
         context=context,
@@ -89,15 +132,134 @@ async def _render_recipe_form(
     )
 
 
+def _encode_cursor(recipe: Recipe) -> str:
+    """Encode the keyset position of a recipe as an opaque, URL-safe cursor."""
+    return urlsafe_base64_encode(f"{recipe.created_at.isoformat()}|{recipe.pk}".encode())
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    """Decode a cursor created by `_encode_cursor`, returning None if it is malformed."""
+    try:
+        created_at_raw, recipe_id_raw = urlsafe_base64_decode(cursor).decode().split("|", 1)
+        return datetime.fromisoformat(created_at_raw), int(recipe_id_raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+async def _fetch_recipe_page(cursor: tuple[datetime, int] | None) -> tuple[list[Recipe], str | None]:
+    """Fetch one page of recipe cards ordered by (-created_at, -id) and the cursor of the next page."""
+    page_size: int = settings.RECIPE_LIST_PAGE_SIZE
+    queryset = Recipe.objects.only(*RECIPE_CARD_FIELDS).order_by("-created_at", "-id")
+    if cursor is not None:
+        created_at, recipe_id = cursor
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=recipe_id))
+
+    # Fetch a single extra row to know whether another page exists
+    recipes: list[Recipe] = [recipe async for recipe in queryset[: page_size + 1]]
+    if len(recipes) <= page_size:
+        return recipes, None
+    recipes = recipes[:page_size]
+    return recipes, _encode_cursor(recipes[-1])
+
+
+async def _search_recipe_page(query: str, page: int) -> tuple[list[Recipe], bool]:
+    """Fetch one page of recipe cards matching `query`, best match first, and whether another page exists."""
+    page_size: int = settings.RECIPE_LIST_PAGE_SIZE
+    recipe_ids = await timed_sync_to_async(search_recipe_ids, "search", executor="db")(
+        query, limit=page_size + 1, offset=(page - 1) * page_size
+    )
+    has_next_page = len(recipe_ids) > page_size
+    recipe_ids = recipe_ids[:page_size]
+    recipes_by_id = await sync_to_async(Recipe.objects.only(*RECIPE_CARD_FIELDS).in_bulk)(recipe_ids)
+    return [recipes_by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes_by_id], has_next_page
+
+
+async def _fetch_list_page(
+    query: str, page: int, cursor: tuple[datetime, int] | None
+) -> tuple[list[Recipe], dict[str, str | int] | None]:
+    """Return the recipes of a list page with the query parameters of the next page, None on the last page."""
+    if query:
+        recipes, has_next_page = await _search_recipe_page(query, page)
+        return recipes, {"q": query, "page": page + 1} if has_next_page else None
+    recipes, next_cursor = await _fetch_recipe_page(cursor)
+    return recipes, {"cursor": next_cursor} if next_cursor is not None else None
+
+
+async def _list_context(query: str, page: int, cursor: tuple[datetime, int] | None) -> dict[str, Any]:
+    recipes, next_page_params = await _fetch_list_page(query, page, cursor)
+    next_page_url = f"{reverse('recipe_list')}?{urlencode(next_page_params)}" if next_page_params else None
+    return {"recipes": recipes, "next_page_url": next_page_url, "query": query}
+
+
+async def _render_next_page(request: HttpRequest, context: dict[str, Any]) -> DatastarResponse:
+    """Render the recipe cards of a subsequent page, appended to the grid together with a new sentinel."""
+    rendered_cards, rendered_sentinel = await timed_sync_to_async(
+        lambda: (
+            render_to_string("recipes/_recipe_cards.html", context, request=request),
+            render_to_string("recipes/_recipe_list_sentinel.html", context, request=request),
+        ),
+        "render",
+        executor="render",
+    )()
+    events = [
+        ServerSentEventGenerator.patch_elements(rendered_cards, selector="#recipe-grid", mode=ElementPatchMode.APPEND),
+        ServerSentEventGenerator.patch_elements(
+            rendered_sentinel, selector="#recipe-list-sentinel", mode=ElementPatchMode.REPLACE
+        ),
+    ]
+    return DatastarResponse(events)
+
+
 @require_http_methods(["GET"])
 async def recipe_list(request: HttpRequest) -> HttpResponse:
-    """Display list of all recipes"""
-    recipes: list[Recipe] = [recipe async for recipe in Recipe.objects.all().order_by("-created_at")]
-    return await sync_to_async(render)(
+    """Display the recipes page by page, newest first or ranked by relevance when searching.
+
+    The first page is rendered as a full HTML page, which anonymous visitors are served from the page cache.
+    Subsequent pages are requested by the infinite scroll sentinel through Datastar and streamed back as fragments
+    appended to the recipe grid.
+    """
+    query = request.GET.get("q", "").strip()
+    page = 1
+    cursor: tuple[datetime, int] | None = None
+    if query:
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid page.")
+    elif raw_cursor := request.GET.get("cursor"):
+        cursor = _decode_cursor(raw_cursor)
+        if cursor is None:
+            return HttpResponseBadRequest("Invalid cursor.")
+
+    if "Datastar-Request" in request.headers:
+        # Each further page is fetched once while scrolling, so it is not worth counting the recipes to validate it
+        context = await _list_context(query, page, cursor)
+        return cast(HttpResponse, await _render_next_page(request, context))
+
+    lookup = await alookup_page(request, "list")
+    if lookup is not None and lookup.page is not None:
+        return cast(HttpResponse, serve_page(request, lookup.page))
+
+    # Any change of a recipe moves the latest update, deletions change the count
+    state = await Recipe.objects.aaggregate(last_modified=Max("updated_at"), count=Count("id"))
+    etag_parts = (request.get_full_path(), state["last_modified"], state["count"])
+    etag = await amake_page_etag(request, *etag_parts)
+    if (response := not_modified(request, etag, state["last_modified"])) is not None:
+        return cast(HttpResponse, response)
+
+    context = await _list_context(query, page, cursor)
+    if query:
+        recipe_count = await timed_sync_to_async(count_search_results, "search", executor="db")(query)
+    else:
+        recipe_count = state["count"]
+    response = await timed_sync_to_async(render, "render", executor="render")(
         request=request,
         template_name="recipes/recipe_list.html",
-        context={"recipes": recipes},
+        context={**context, "recipe_count": recipe_count},
     )
+    if lookup is not None:
+        await astore_page(lookup, response, etag_parts, state["last_modified"])
+    return cast(HttpResponse, set_validators(response, etag, state["last_modified"]))
 
 
 class RecipeCreateView(View):
@@ -120,13 +282,13 @@ class RecipeCreateView(View):
             return HttpResponse(status=403)
         form, ingredient_formset = _build_recipe_forms(request)
 
-        is_form_valid = await sync_to_async(form.is_valid)()
-        is_formset_valid = await sync_to_async(ingredient_formset.is_valid)()
+        is_form_valid = await timed_sync_to_async(form.is_valid, "forms", executor="db")()
+        is_formset_valid = await timed_sync_to_async(ingredient_formset.is_valid, "forms", executor="db")()
 
         if is_form_valid and is_formset_valid:
-            saved_recipe = await sync_to_async(form.save)()
-            ingredient_formset.instance = saved_recipe
-            await sync_to_async(ingredient_formset.save)()
+            saved_recipe = await timed_sync_to_async(_save_recipe_forms, "forms", executor="db")(
+                form, ingredient_formset
+            )
             return redirect("recipe_detail", recipe_id=saved_recipe.pk)
 
         return await _render_recipe_form(
@@ -139,17 +301,42 @@ class RecipeCreateView(View):
         )
 
 
+async def _render_recipe_detail(request: HttpRequest, recipe: Recipe) -> HttpResponse:
+    snapshot = await aget_ingredient_snapshot(recipe.id, updated_at=recipe.updated_at)
+    return await timed_sync_to_async(render, "render", executor="render")(
+        request=request,
+        template_name="recipes/recipe_detail.html",
+        context={"recipe": recipe, "ingredients": snapshot.ingredients},
+    )
+
+
+async def _render_cacheable_recipe_detail(
+    request: HttpRequest, recipe_id: int
+) -> tuple[HttpResponse, tuple[object, ...], datetime | None]:
+    recipe = await aget_recipe(recipe_id)
+    response = await _render_recipe_detail(request, recipe)
+    return response, (recipe.id, recipe.updated_at), recipe.updated_at
+
+
 class RecipeDetailView(View):
     async def get(self, request: HttpRequest, recipe_id: int) -> HttpResponse:
-        """Display recipe details with portions input (default=1)"""
-        recipe: Recipe = await aget_object_or_404(Recipe, id=recipe_id)
-        ingredients: list[Ingredient] = [ingredient async for ingredient in recipe.ingredients.all()]
-
-        return await sync_to_async(render)(
-            request=request,
-            template_name="recipes/recipe_detail.html",
-            context={"recipe": recipe, "ingredients": ingredients},
-        )
+        """Display recipe details with portions input (default=1)
+
+        Concurrent anonymous visitors missing the cached page share one render of it.
+        """
+        lookup = await alookup_page(request, f"recipe:{recipe_id}")
+        if lookup is not None:
+            render_page = partial(_render_cacheable_recipe_detail, request, recipe_id)
+            page = lookup.page or await arender_page(lookup, render_page)
+            if page is not None:
+                return cast(HttpResponse, serve_page(request, page))
+
+        recipe = await aget_recipe(recipe_id)
+        etag = await amake_page_etag(request, recipe.id, recipe.updated_at)
+        if (response := not_modified(request, etag, recipe.updated_at)) is not None:
+            return cast(HttpResponse, response)
+        response = await _render_recipe_detail(request, recipe)
+        return cast(HttpResponse, set_validators(response, etag, recipe.updated_at))
 
     async def delete(self, request: HttpRequest, recipe_id: int) -> HttpResponse:
         """Delete recipe"""
@@ -186,12 +373,11 @@ class RecipeChangeView(View):
         recipe: Recipe = await aget_object_or_404(Recipe, id=recipe_id)
         form, ingredient_formset = _build_recipe_forms(request, recipe)
 
-        is_form_valid = await sync_to_async(form.is_valid)()
-        is_formset_valid = await sync_to_async(ingredient_formset.is_valid)()
+        is_form_valid = await timed_sync_to_async(form.is_valid, "forms", executor="db")()
+        is_formset_valid = await timed_sync_to_async(ingredient_formset.is_valid, "forms", executor="db")()
 
         if is_form_valid and is_formset_valid:
-            await sync_to_async(form.save)()
-            await sync_to_async(ingredient_formset.save)()
+            await timed_sync_to_async(_save_recipe_forms, "forms", executor="db")(form, ingredient_formset)
             response = redirect("recipe_detail", recipe_id=recipe.id)
             response.status_code = 303
             return response
@@ -207,23 +393,62 @@ class RecipeChangeView(View):
         )
 
 
-@datastar_response
 @require_http_methods(["GET"])
-async def recipe_ingredients(request: HttpRequest, recipe_id: int) -> AsyncGenerator[Any, None]:
+async def recipe_ingredients(request: HttpRequest, recipe_id: int) -> HttpResponse:
     """Return updated ingredients HTML based on portions parameter"""
-    recipe: Recipe = await aget_object_or_404(Recipe, id=recipe_id)
-    ingredients: list[Ingredient] = [ingredient async for ingredient in recipe.ingredients.all()]
+    snapshot = await aget_ingredient_snapshot(recipe_id)
     signals: dict[str, Any] | None = read_signals(request)
     portions = _normalize_portions(signals)
 
-    # Calculate quantities based on portions
-    calculated_ingredients: list[dict[str, Any]] = [
-        {"name": ing.name, "quantity": ing.quantity * portions, "unit": ing.unit} for ing in ingredients
-    ]
+    # The fragment only depends on the ingredients, not on the user
+    etag = make_etag(recipe_id, snapshot.updated_at, portions)
+    if (response := not_modified(request, etag, snapshot.updated_at)) is not None:
+        return cast(HttpResponse, response)
+
+    rendered_html: str = render_ingredients_fragment(snapshot, portions)
+
+    async def events() -> AsyncGenerator[Any, None]:
+        yield ServerSentEventGenerator.patch_elements(rendered_html)
+
+    return cast(HttpResponse, set_validators(DatastarResponse(events()), etag, snapshot.updated_at))
 
-    rendered_html: str = render_to_string("recipes/_ingredients.html", {"ingredients": calculated_ingredients})
 
-    yield ServerSentEventGenerator.patch_elements(rendered_html)
+@require_http_methods(["GET"])
+async def recipe_stream(request: HttpRequest, recipe_id: int) -> HttpResponse:
+    """Keep a stream open for a recipe page, pushing changes of the recipe and rescaled ingredients to it.
+
+    The stream first assigns the page a channel id, which `recipe_portions` publishes the portions to. Changes
+    committed by any worker are pushed as well, and the page is redirected to the list once the recipe is deleted.
+    Idle streams are kept alive with comments until the page disconnects.
+    """
+    # Loaded on the database pool, so the thread of the request opens no connection the stream would keep
+    recipe = await aget_recipe(recipe_id)
+    stream = RecipeStream(recipe, language=get_language(), portions=_normalize_portions(read_signals(request)))
+    return cast(HttpResponse, DatastarResponse(stream.events()))
+
+
+@require_http_methods(["POST"])
+async def recipe_portions(request: HttpRequest, recipe_id: int) -> HttpResponse:
+    """Pass changed portions to the stream of the page, or answer with the rescaled ingredients without one.
+
+    A stream served by this worker receives them directly. Otherwise they are broadcast to the other workers if the
+    broadcast is shared, so a stream served by one of them renders later changes with them, and answered as well,
+    as the stream may have disconnected since the page learned its channel.
+    """
+    signals: dict[str, Any] | None = read_signals(request)
+    portions = _normalize_portions(signals)
+    channel_id = signals.get("channel") if signals else None
+    if isinstance(channel_id, str) and channel_id:
+        broadcaster = get_broadcaster()
+        message = {"recipe_id": recipe_id, "portions": portions}
+        if broadcaster.deliver(page_topic(channel_id), message):
+            return cast(HttpResponse, DatastarResponse())
+        if broadcaster.shared:
+            await broadcaster.apublish(page_topic(channel_id), message)
+
+    snapshot = await aget_ingredient_snapshot(recipe_id)
+    rendered_html = render_ingredients_fragment(snapshot, portions)
+    return cast(HttpResponse, DatastarResponse(ServerSentEventGenerator.patch_elements(rendered_html)))
 
 
 def _extract_formset_prefix(data: dict[str, Any]) -> str | None:
@@ -233,68 +458,61 @@ def _extract_formset_prefix(data: dict[str, Any]) -> str | None:
     return None
 
 
+def _render_new_ingredient_row(request: HttpRequest, prefix: str, index: int) -> tuple[str, str]:
+    """Render an empty ingredient row numbered `index` and the form count including it."""
+    ingredient_formset = IngredientFormSet(instance=Recipe(), prefix=prefix)
+    rendered_row = render_to_string(
+        "recipes/_ingredient_form_row.html", {"ingredient_form": ingredient_formset.empty_form}, request=request
+    )
+    management_form = ManagementForm(
+        auto_id=ingredient_formset.auto_id, prefix=prefix, initial={TOTAL_FORM_COUNT: index + 1}
+    )
+    return rendered_row.replace("__prefix__", str(index)), str(management_form[TOTAL_FORM_COUNT])
+
+
 @require_http_methods(["POST"])
 async def add_ingredient_form(request: HttpRequest) -> HttpResponse:
-    """Morph the entire ingredient section after add/remove actions."""
+    """Add or remove a single ingredient row of the recipe form.
+
+    Only the affected row is sent back: a new empty row appended to the list together with the increased form
+    count, or a hidden row that marks a removed ingredient for deletion on save. Neither grows with the number of
+    ingredients of the recipe.
+    """
     if not await _user_has_any_permission(request, "recipes.add_recipe", "recipes.change_recipe"):
         return HttpResponse(status=403)
-    data = request.POST.copy()
-    action = data.get("form_action")
+    action = request.POST.get("form_action")
     if not action:
         return HttpResponseBadRequest("Missing form action.")
 
-    recipe: Recipe | None = None
-    recipe_id = data.get("recipe_id")
-    if recipe_id:
-        try:
-            recipe_pk = int(recipe_id)
-        except (TypeError, ValueError):
-            return HttpResponseBadRequest("Invalid recipe id.")
-        recipe = await aget_object_or_404(Recipe, id=recipe_pk)
-
-    prefix = _extract_formset_prefix(data)
+    prefix = _extract_formset_prefix(request.POST)
     if prefix is None:
         return HttpResponseBadRequest("Missing management form data.")
-
-    total_key = f"{prefix}-TOTAL_FORMS"
     try:
-        current_total = int(data.get(total_key, 0))
+        current_total = int(request.POST.get(f"{prefix}-{TOTAL_FORM_COUNT}", 0))
     except (TypeError, ValueError):
         return HttpResponseBadRequest("Invalid management form counts.")
 
     if action == "add_ingredient":
-        data[total_key] = str(current_total + 1)
+        rendered_row, rendered_total = await timed_sync_to_async(
+            _render_new_ingredient_row, "render", executor="render"
+        )(request, prefix, current_total)
+        events = [
+            ServerSentEventGenerator.patch_elements(
+                rendered_row, selector="#ingredients-list", mode=ElementPatchMode.APPEND
+            ),
+            ServerSentEventGenerator.patch_elements(rendered_total),
+        ]
     elif action.startswith("remove:"):
         form_prefix = action.split(":", 1)[1]
-        delete_key = f"{form_prefix}-DELETE"
-        data[delete_key] = "on"
+        match = re.fullmatch(rf"{re.escape(prefix)}-(\d+)", form_prefix)
+        if match is None or int(match.group(1)) >= current_total:
+            return HttpResponseBadRequest("Unknown ingredient form.")
+        rendered_row = await timed_sync_to_async(render_to_string, "render", executor="render")(
+            "recipes/_ingredient_form_removed.html",
+            {"form_prefix": form_prefix, "ingredient_id": request.POST.get(f"{form_prefix}-id", "")},
+        )
+        events = [ServerSentEventGenerator.patch_elements(rendered_row)]
     else:
         return HttpResponseBadRequest("Unknown form action.")
 
-    formset_instance = recipe if recipe is not None else Recipe()
-    ingredient_formset: BaseInlineFormSet = await sync_to_async(
-        lambda: IngredientFormSet(
-            data=data,
-            files=request.FILES,
-            instance=formset_instance,
-            prefix=prefix,
-        )
-    )()
-
-    rendered_section = await sync_to_async(render_to_string)(
-        "recipes/_ingredient_section.html",
-        {
-            "ingredient_formset": ingredient_formset,
-            "recipe": formset_instance,
-        },
-        request=request,
-    )
-
-    response = DatastarResponse(
-        ServerSentEventGenerator.patch_elements(
-            rendered_section,
-            selector="#ingredients-section",
-            mode=ElementPatchMode.REPLACE,
-        )
-    )
-    return cast(HttpResponse, response)
+    return cast(HttpResponse, DatastarResponse(events))
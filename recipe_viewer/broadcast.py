@@ -0,0 +1,207 @@
+"""
+Broadcast of messages to the open streams of every worker.
+
+Messages are JSON-serializable dicts published to a topic, like ``recipe:<id>``, and received by each subscription
+to the topic. ``BROADCAST_BACKEND`` selects the transport: "local" only reaches the subscriptions of the publishing
+worker, which suffices for a single one, and "postgres" sends messages with ``NOTIFY``, which every worker
+``LISTEN``s for on a connection of its own. Each subscription queues at most ``BROADCAST_QUEUE_SIZE`` messages, so
+a client that stops reading cannot grow the memory of its worker: once the queue is full, its oldest message is
+dropped for the newest.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from itertools import batched
+from typing import Any
+
+import psycopg
+from django.conf import settings
+from django.db import connection
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+from recipe_viewer.apps.monitoring import metrics
+from recipe_viewer.apps.monitoring.timing import timed_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+type Message = dict[str, Any]
+
+# Notifications sent by one statement, each may carry up to 8000 bytes
+NOTIFY_BATCH_SIZE = 100
+
+
+class Subscription:
+    """Queue of the messages published to some topics, for a single consumer."""
+
+    def __init__(self, topics: frozenset[str], maxsize: int) -> None:
+        self.topics = topics
+        self._queue: asyncio.Queue[tuple[str, Message]] = asyncio.Queue(maxsize)
+
+    def put(self, topic: str, message: Message) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            metrics.BROADCAST_DROPPED.inc()
+        self._queue.put_nowait((topic, message))
+        metrics.BROADCAST_DELIVERED.inc()
+
+    async def receive(self, timeout: float, debounce: float = 0.0) -> list[tuple[str, Message]]:
+        """Wait up to `timeout` seconds for messages, an empty list if none arrived.
+
+        Messages arriving within `debounce` seconds after the first are returned along with it, so a burst of them
+        can be handled at once.
+        """
+        try:
+            messages = [await asyncio.wait_for(self._queue.get(), timeout)]
+        except TimeoutError:
+            return []
+        if debounce:
+            await asyncio.sleep(debounce)
+        while not self._queue.empty():
+            messages.append(self._queue.get_nowait())
+        return messages
+
+
+class Broadcaster:
+    """Deliver published messages to the subscriptions of this worker."""
+
+    # Whether messages also reach the subscriptions of other workers
+    shared = False
+
+    def __init__(self) -> None:
+        # Only changed and read on the event loop of the worker
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @contextmanager
+    def subscribe(self, *topics: str) -> Iterator[Subscription]:
+        """Subscribe to `topics` while the block runs, which has to be on the event loop of the worker."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(frozenset(topics), settings.BROADCAST_QUEUE_SIZE)
+        for topic in subscription.topics:
+            self._subscriptions.setdefault(topic, set()).add(subscription)
+        metrics.BROADCAST_SUBSCRIPTIONS.inc()
+        try:
+            yield subscription
+        finally:
+            for topic in subscription.topics:
+                subscriptions = self._subscriptions[topic]
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[topic]
+            metrics.BROADCAST_SUBSCRIPTIONS.dec()
+
+    def deliver(self, topic: str, message: Message) -> bool:
+        """Deliver a message to the subscriptions of this worker only, False if it has none to `topic`.
+
+        Meant for topics with a single subscription, like that of a page, which need not be sent to every worker
+        when it is held by this one. Has to be called on the event loop of the worker.
+        """
+        if topic not in self._subscriptions:
+            return False
+        self._dispatch(topic, message)
+        return True
+
+    def publish(self, messages: Iterable[tuple[str, Message]]) -> None:
+        """Publish each message to its topic, from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        for topic, message in messages:
+            loop.call_soon_threadsafe(self._dispatch, topic, message)
+
+    async def apublish(self, topic: str, message: Message) -> None:
+        self._dispatch(topic, message)
+
+    def _dispatch(self, topic: str, message: Message) -> None:
+        for subscription in tuple(self._subscriptions.get(topic, ())):
+            subscription.put(topic, message)
+
+
+class PostgresBroadcaster(Broadcaster):
+    """Send messages through ``NOTIFY`` on ``BROADCAST_CHANNEL``.
+
+    A worker starts listening with its first subscription. Messages published while its listening connection is
+    being reestablished are lost.
+    """
+
+    shared = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._listener: asyncio.Task[None] | None = None
+
+    @contextmanager
+    def subscribe(self, *topics: str) -> Iterator[Subscription]:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        with super().subscribe(*topics) as subscription:
+            yield subscription
+
+    def publish(self, messages: Iterable[tuple[str, Message]]) -> None:
+        """Publish each message to its topic, with the database connection of the calling thread.
+
+        Within a transaction, the messages are only sent once it commits.
+        """
+        payloads = [
+            json.dumps({"topic": topic, "message": message}, separators=(",", ":")) for topic, message in messages
+        ]
+        with connection.cursor() as cursor:
+            for batch in batched(payloads, NOTIFY_BATCH_SIZE):
+                notifications = ", ".join(["pg_notify(%s, %s)"] * len(batch))
+                params = [value for payload in batch for value in (settings.BROADCAST_CHANNEL, payload)]
+                cursor.execute(f"SELECT {notifications}", params)  # noqa: S608
+
+    async def apublish(self, topic: str, message: Message) -> None:
+        await timed_sync_to_async(self.publish, "broadcast", executor="db")([(topic, message)])
+
+    @staticmethod
+    def _conninfo() -> str:
+        database = settings.DATABASES["default"]
+        return make_conninfo(
+            dbname=database.get("NAME") or None,
+            user=database.get("USER") or None,
+            password=database.get("PASSWORD") or None,
+            host=database.get("HOST") or None,
+            port=database.get("PORT") or None,
+        )
+
+    async def _listen(self) -> None:
+        delay = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo(), autocommit=True) as listener:
+                    await listener.execute(sql.SQL("LISTEN {}").format(sql.Identifier(settings.BROADCAST_CHANNEL)))
+                    delay = 1.0
+                    async for notification in listener.notifies():
+                        self._receive(notification.payload)
+            except (psycopg.Error, OSError):
+                logger.exception("Listening for broadcast messages failed, reconnecting in %s seconds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _receive(self, payload: str) -> None:
+        try:
+            envelope = json.loads(payload)
+            topic, message = envelope["topic"], envelope["message"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring the malformed broadcast message %r", payload)
+            return
+        self._dispatch(topic, message)
+
+
+BACKENDS: dict[str, type[Broadcaster]] = {
+    "local": Broadcaster,
+    "postgres": PostgresBroadcaster,
+}
+
+
+@cache
+def get_broadcaster() -> Broadcaster:
+    """Return the broadcaster of this worker, as configured by ``BROADCAST_BACKEND``."""
+    return BACKENDS[settings.BROADCAST_BACKEND]()
@@ -0,0 +1,108 @@
+"""
+Bounded in-process caches, each of which belongs to a single worker.
+
+They serve data that is read on most requests, like recipe ingredients or the permissions of users, without a
+query. Entries are dropped when this worker invalidates them or once their time to live expires, so the modules
+that use them decide how changes made by other workers are noticed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Hashable
+
+from recipe_viewer.apps.monitoring import metrics
+
+
+class LRUCache[K: Hashable, V]:
+    """Thread-safe LRU cache with a size bound and a per-entry time to live.
+
+    `generation` is bumped on every invalidation, which records it as the generation of the invalidated key.
+    Callers that compute a value outside the lock pass the generation they started with to `set`, so a value
+    loaded before a concurrent invalidation of its key is not stored, while invalidations of other keys do not
+    affect it. Only the latest `maxsize` invalidated keys are remembered, older ones count as invalidated with
+    the oldest remembered one.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._generation = 0
+        self._invalidated: OrderedDict[K, int] = OrderedDict()
+        # Generation of the keys that are not remembered in `_invalidated`
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def key_generation(self, key: K) -> int:
+        """Return the generation `key` was last invalidated in."""
+        return self._invalidated.get(key, self._floor)
+
+    def get(self, key: K, validate: Callable[[V], bool] | None = None) -> V | None:
+        """Return the cached value, dropping it if it has expired or `validate` rejects it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic() or (validate is not None and not validate(value)):
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, generation: int | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and self.key_generation(key) > generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, self._floor = self._invalidated.popitem(last=False)
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def collect_metrics(self, name: str) -> None:
+        """Mirror the statistics of this cache into the metrics of the worker, labelled with `name`."""
+        metrics.CACHE_HITS.set(self.hits, cache=name)
+        metrics.CACHE_MISSES.set(self.misses, cache=name)
+        metrics.CACHE_ENTRIES.set(len(self), cache=name)
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,103 @@
+"""
+Bounded thread pools for the synchronous work of the async views.
+
+By default ``sync_to_async`` runs calls thread-sensitively, and Django's ASGI handler gives every request a thread
+of its own for them. Concurrent requests therefore start as many threads, all rendering at once and competing for
+the GIL and for database connections, so one burst of slow renders slows down every request of the worker. The
+pools configured in ``EXECUTORS`` bound that work instead: calls beyond a pool's size queue up, and the queue
+depth, the wait and the running calls are exported as metrics. Pools with a limit in ``EXECUTOR_QUEUE_LIMITS``
+reject calls with ``ExecutorSaturated`` once that many are waiting, so callers can shed load.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+
+from recipe_viewer.apps.monitoring import metrics
+
+
+class ExecutorSaturated(RuntimeError):  # noqa: N818
+    """The queue of a pool is full."""
+
+
+def _close_unusable_connections() -> None:
+    # `close_if_unusable_or_obsolete` without the age check, which is meant for the connection of a request
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is None:
+            continue
+        if connection.get_autocommit() != connection.settings_dict["AUTOCOMMIT"]:
+            connection.close()
+        elif connection.errors_occurred:
+            if connection.is_usable():
+                connection.errors_occurred = False
+            else:
+                connection.close()
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """Thread pool counting its queued and running calls and managing the connections of its threads.
+
+    Pool threads outlive requests, so their connections are kept open across calls instead of connecting for every
+    call as ``CONN_MAX_AGE`` of 0 would. Connections that failed or were left inside a transaction are closed after
+    a call, like Django does for a request.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queued: int | None = None) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"{name}-executor")
+        self.name = name
+        self.max_queued = max_queued
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+
+    def submit[R](self, fn: Callable[..., R], /, *args: Any, **kwargs: Any) -> Future[R]:
+        with self._queued_lock:
+            if self.max_queued is not None and self._queued >= self.max_queued:
+                metrics.EXECUTOR_REJECTED.inc(executor=self.name)
+                msg = f"{self._queued} calls are already waiting for the {self.name} pool."
+                raise ExecutorSaturated(msg)
+            self._queued += 1
+        submitted_at = time.perf_counter()
+        metrics.EXECUTOR_QUEUED.inc(executor=self.name)
+
+        def run() -> R:
+            self._dequeue()
+            metrics.EXECUTOR_WAIT.observe(time.perf_counter() - submitted_at, executor=self.name)
+            metrics.EXECUTOR_RUNNING.inc(executor=self.name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _close_unusable_connections()
+                metrics.EXECUTOR_RUNNING.dec(executor=self.name)
+
+        future = super().submit(run)
+        # A call cancelled while queued never runs, e.g. when the client disconnects
+        future.add_done_callback(lambda done: done.cancelled() and self._dequeue())
+        return future
+
+    def _dequeue(self) -> None:
+        with self._queued_lock:
+            self._queued -= 1
+        metrics.EXECUTOR_QUEUED.dec(executor=self.name)
+
+
+_executors: dict[str, InstrumentedExecutor | None] = {}
+_lock = threading.Lock()
+
+
+def get_executor(name: str) -> InstrumentedExecutor | None:
+    """Return the pool configured as `name` in ``EXECUTORS``, None if it has no threads."""
+    executor = _executors.get(name)
+    if executor is not None or name in _executors:
+        return executor
+    with _lock:
+        if name not in _executors:
+            max_workers = settings.EXECUTORS.get(name, 0)
+            max_queued = settings.EXECUTOR_QUEUE_LIMITS.get(name)
+            _executors[name] = InstrumentedExecutor(name, max_workers, max_queued) if max_workers > 0 else None
+        return _executors[name]
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 from django.utils.translation import gettext_lazy as _
@@ -42,9 +43,13 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "recipe_viewer.apps.accounts",
     "recipe_viewer.apps.recipes",
+    "recipe_viewer.apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    "recipe_viewer.apps.monitoring.middleware.ServerTimingMiddleware",
+    "recipe_viewer.apps.monitoring.middleware.MetricsMiddleware",
+    "recipe_viewer.apps.monitoring.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
@@ -66,6 +71,8 @@ TEMPLATES = [
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
+                # Overrides `perms` of the processor above, which the admin requires to be enabled
+                "recipe_viewer.apps.accounts.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
         },
@@ -160,3 +167,123 @@ AUTH_USER_MODEL = "accounts.User"
 LOGIN_URL = "accounts:login"
 LOGIN_REDIRECT_URL = "recipe_list"
 LOGOUT_REDIRECT_URL = "recipe_list"
+
+# Per-worker cache of the permissions of users and groups (number of users and of groups, seconds). Permissions
+# revoked on one worker are still granted by the others until their entries expire.
+PERMISSION_CACHE_SIZE = int(os.environ.get("PERMISSION_CACHE_SIZE", "1024"))
+PERMISSION_CACHE_TTL = float(os.environ.get("PERMISSION_CACHE_TTL", "10"))
+
+# Recipes
+RECIPE_LIST_PAGE_SIZE = int(os.environ.get("RECIPE_LIST_PAGE_SIZE", "24"))
+# Per-worker cache of recipe ingredients used when scaling portions (number of recipes, seconds). Scaling requests
+# are served ingredients changed on another worker only once the entry expires.
+RECIPE_INGREDIENT_CACHE_SIZE = int(os.environ.get("RECIPE_INGREDIENT_CACHE_SIZE", "1024"))
+RECIPE_INGREDIENT_CACHE_TTL = float(os.environ.get("RECIPE_INGREDIENT_CACHE_TTL", "60"))
+# Per-worker cache of rendered ingredient lists (number of recipe, portions and language combinations)
+RECIPE_FRAGMENT_CACHE_SIZE = int(os.environ.get("RECIPE_FRAGMENT_CACHE_SIZE", "4096"))
+# Seconds the changes sent to the stream of a recipe page are collected before the latest ones are rendered
+RECIPE_STREAM_DEBOUNCE = float(os.environ.get("RECIPE_STREAM_DEBOUNCE", "0.15"))
+# Seconds between keepalive comments on an idle stream of a recipe page
+RECIPE_STREAM_KEEPALIVE_INTERVAL = float(os.environ.get("RECIPE_STREAM_KEEPALIVE_INTERVAL", "15"))
+
+# Query budgets
+# Maximum number of queries per URL name, including the session, user and permission lookups of a logged in user
+QUERY_BUDGETS: dict[str, int] = {
+    "recipe_list": 7,
+    "recipe_detail": 6,
+    "recipe_ingredients": 2,
+    "recipe_portions": 3,
+    "recipe_create": 7,
+    "recipe_change": 11,
+    "add_ingredient_form": 4,
+}
+QUERY_BUDGETS_ENABLED = os.environ.get("QUERY_BUDGETS_ENABLED", str(DEBUG)) == "True"
+# Raise instead of logging violations, enabled by `manage.py test --query-budgets`
+QUERY_BUDGETS_STRICT = os.environ.get("QUERY_BUDGETS_STRICT", "False") == "True"
+# Number of runs of the same statement within a request that is reported as an N+1 pattern
+QUERY_BUDGET_REPEAT_THRESHOLD = int(os.environ.get("QUERY_BUDGET_REPEAT_THRESHOLD", "5"))
+TEST_RUNNER = "recipe_viewer.apps.monitoring.test_runner.QueryBudgetTestRunner"
+
+# Logging
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    # Shared with uvicorn's --log-level, which takes the level in lowercase
+    "loggers": {"recipe_viewer": {"handlers": ["console"], "level": os.environ.get("LOG_LEVEL", "INFO").upper()}},
+}
+
+# Server timing
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "True") == "True"
+# Share of requests whose timings are also logged as JSON to the "recipe_viewer.timing" logger
+SERVER_TIMING_LOG_SAMPLE_RATE = float(os.environ.get("SERVER_TIMING_LOG_SAMPLE_RATE", "0.01"))
+
+# Metrics
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True") == "True"
+# Directory the worker processes write their metrics to, emptied by `entrypoint.sh` before they start
+METRICS_DIR = os.environ.get("METRICS_DIR", str(Path(tempfile.gettempdir()) / "recipe_viewer_metrics"))
+# Seconds between the snapshots of a worker, other workers' metrics lag behind by up to this long
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+
+# Health checks
+# Seconds above which `/health/ready/` reports the worker as not ready
+HEALTH_DATABASE_THRESHOLD = float(os.environ.get("HEALTH_DATABASE_THRESHOLD", "0.25"))
+HEALTH_EVENT_LOOP_LAG_THRESHOLD = float(os.environ.get("HEALTH_EVENT_LOOP_LAG_THRESHOLD", "0.1"))
+HEALTH_THREAD_POOL_THRESHOLD = float(os.environ.get("HEALTH_THREAD_POOL_THRESHOLD", "0.1"))
+# Seconds after which a probe that has not finished counts as failed
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", "2"))
+
+# Thread pools
+# Threads per worker for the synchronous work of the async views, 0 runs it on the thread of the request instead.
+# Rendering is CPU-bound and gains nothing from more threads than cores, the database pool bounds the connections.
+EXECUTORS = {
+    "render": int(os.environ.get("EXECUTOR_RENDER_THREADS", str(os.cpu_count() or 1))),
+    "db": int(os.environ.get("EXECUTOR_DB_THREADS", "8")),
+    # Password hashing takes hundreds of milliseconds, so a burst of logins must not occupy the other pools
+    "auth": int(os.environ.get("EXECUTOR_AUTH_THREADS", "2")),
+}
+# Calls allowed to wait for a thread before further ones are rejected, logins beyond it answer 429
+EXECUTOR_QUEUE_LIMITS = {
+    "auth": int(os.environ.get("EXECUTOR_AUTH_QUEUE_LIMIT", "16")),
+}
+
+# Page cache
+# Full pages served to anonymous visitors. "locmem" caches them per worker, so other workers keep serving a changed
+# recipe until PAGE_CACHE_TIMEOUT expires, "filesystem" shares them between the workers of a host and "redis" with
+# every host using the same PAGE_CACHE_URL.
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "True") == "True"
+PAGE_CACHE_BACKEND = os.environ.get("PAGE_CACHE_BACKEND", "filesystem")
+# Seconds a page is kept at most, changed recipes invalidate their pages right away
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", "3600"))
+PAGE_CACHE_BACKENDS = {
+    "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pages"},
+    # Emptied by `entrypoint.sh` on startup, so no pages of the previous release are served
+    "filesystem": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("PAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "recipe_viewer_pages")),
+    },
+    # Requires the redis package
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("PAGE_CACHE_URL", "redis://localhost:6379/0"),
+    },
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "pages": {
+        **PAGE_CACHE_BACKENDS[PAGE_CACHE_BACKEND],
+        "TIMEOUT": PAGE_CACHE_TIMEOUT,
+        "KEY_PREFIX": "page",
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", "10000"))},
+    },
+}
+
+# Broadcast
+# Transport of the changes pushed to open recipe pages, "local" only reaches the pages streamed by the worker that
+# made the change and "postgres" those of every worker through LISTEN/NOTIFY
+BROADCAST_BACKEND = os.environ.get(
+    "BROADCAST_BACKEND", "postgres" if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql" else "local"
+)
+BROADCAST_CHANNEL = os.environ.get("BROADCAST_CHANNEL", "recipe_viewer")
+# Messages a stream may fall behind by before its oldest ones are dropped
+BROADCAST_QUEUE_SIZE = int(os.environ.get("BROADCAST_QUEUE_SIZE", "64"))
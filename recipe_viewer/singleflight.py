@@ -0,0 +1,54 @@
+"""
+Coalescing of concurrent identical loads within a worker.
+
+When many requests for the same recipe arrive at once, each of them would run the same queries and render the same
+page. A ``SingleFlight`` runs the load of a key once for every caller that asks for it while it is in flight, and
+hands all of them its result or exception. Nothing is kept once the load finishes, so later callers start a new
+one; caching stays the job of the caches. Loads run as tasks of their own, so a leader that disconnects does not
+cancel the load its followers wait for.
+
+A ``SingleFlight`` belongs to the event loop of the worker and must only be used from it.
+"""
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+
+from recipe_viewer.apps.monitoring import metrics
+from recipe_viewer.apps.monitoring.timing import timed
+
+
+class SingleFlight[K: Hashable, V]:
+    """Share the result of a load among the concurrent callers asking for the same key."""
+
+    def __init__(self, name: str) -> None:
+        # Label of the metrics of this flight
+        self.name = name
+        self._flights: dict[K, asyncio.Future[V]] = {}
+
+    async def do(self, key: K, load: Callable[[], Awaitable[V]]) -> V:
+        """Return the result of `load`, or of the load already in flight for `key`."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            metrics.SINGLEFLIGHT_COALESCED.inc(flight=self.name)
+            with timed("coalesced"):
+                return await asyncio.shield(flight)
+
+        flight = asyncio.ensure_future(load())
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        metrics.SINGLEFLIGHT_LOADS.inc(flight=self.name)
+        metrics.SINGLEFLIGHT_IN_FLIGHT.inc(flight=self.name)
+        return await asyncio.shield(flight)
+
+    def _land(self, key: K, flight: asyncio.Future[V]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        metrics.SINGLEFLIGHT_IN_FLIGHT.dec(flight=self.name)
+        # Every caller may have disconnected, which must not log the exception as never retrieved
+        if not flight.cancelled():
+            flight.exception()
+
+    def __len__(self) -> int:
+        return len(self._flights)
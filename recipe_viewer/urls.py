@@ -28,6 +28,7 @@ urlpatterns = [
     path("", recipe_list, name="recipe_list"),
     path("recipe/", include("recipe_viewer.apps.recipes.urls")),
     path("accounts/", include("recipe_viewer.apps.accounts.urls")),
+    path("", include("recipe_viewer.apps.monitoring.urls")),
 ]
 
 # Serve media files in development